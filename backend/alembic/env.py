@@ -28,10 +28,15 @@ if config.config_file_name is not None:
 from app.models import (
     MonitoredAccount,
     Post,
+    PostEntity,
     Topic,
     AlertRule,
     AlertLog,
+    AlertOutbox,
+    SummaryCacheEntry,
     Digest,
+    DigestState,
+    ChatMessage,
     Setting,
 )
 
@@ -0,0 +1,29 @@
+"""Add digest input fingerprint
+
+Revision ID: 1f9c4e7a2d58
+Revises: 8e6b2d4f0a15
+Create Date: 2026-10-19 19:02:47.915362
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1f9c4e7a2d58'
+down_revision: Union[str, None] = '8e6b2d4f0a15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing digests have no fingerprint and are never reused
+    op.add_column('digests', sa.Column('input_fingerprint', sa.String(length=64), nullable=True))
+    op.create_index('ix_digests_user_id_input_fingerprint', 'digests', ['user_id', 'input_fingerprint'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_digests_user_id_input_fingerprint', table_name='digests')
+    op.drop_column('digests', 'input_fingerprint')
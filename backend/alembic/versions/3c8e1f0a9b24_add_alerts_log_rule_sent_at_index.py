@@ -0,0 +1,27 @@
+"""Add alerts_log (rule_id, sent_at) index
+
+Revision ID: 3c8e1f0a9b24
+Revises: 7f2d14cb7f5a
+Create Date: 2026-10-19 09:12:41.208311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c8e1f0a9b24'
+down_revision: Union[str, None] = '7f2d14cb7f5a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Supports the per-cycle cooldown preload (latest sent_at per rule)
+    op.create_index('ix_alerts_log_rule_id_sent_at', 'alerts_log', ['rule_id', 'sent_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_log_rule_id_sent_at', table_name='alerts_log')
@@ -0,0 +1,33 @@
+"""Add posts alerts_checked_at
+
+Revision ID: 4b0c9d7e5f82
+Revises: e2f94c6b0a17
+Create Date: 2026-10-19 13:41:30.662057
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b0c9d7e5f82'
+down_revision: Union[str, None] = 'e2f94c6b0a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('posts', sa.Column('alerts_checked_at', sa.DateTime(), nullable=True))
+    # Treat existing posts as already evaluated so they don't alert again
+    op.execute("UPDATE posts SET alerts_checked_at = stored_at")
+    op.create_index(
+        'ix_posts_alerts_unchecked', 'posts', ['id'], unique=False,
+        postgresql_where=sa.text('alerts_checked_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_posts_alerts_unchecked', table_name='posts')
+    op.drop_column('posts', 'alerts_checked_at')
@@ -0,0 +1,35 @@
+"""Add posts embedding HNSW index
+
+Revision ID: 4b8f1d6e2c93
+Revises: e6a0b8d3f217
+Create Date: 2026-10-19 20:12:47.903165
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8f1d6e2c93'
+down_revision: Union[str, None] = 'e6a0b8d3f217'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Approximate nearest-neighbour index for cosine-distance search (ORDER BY embedding <=> q)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_posts_embedding_hnsw', 'posts', ['embedding'], unique=False,
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'vector_cosine_ops'},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_posts_embedding_hnsw', table_name='posts', postgresql_concurrently=True)
@@ -0,0 +1,32 @@
+"""Add alert rule trends
+
+Revision ID: 5d1e7b3a9c04
+Revises: c84d2a6f1e35
+Create Date: 2026-10-19 18:11:52.640283
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1e7b3a9c04'
+down_revision: Union[str, None] = 'c84d2a6f1e35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('alert_rules', sa.Column('trend_terms', sa.JSON(), nullable=True))
+    op.add_column('alert_rules', sa.Column('trend_window_minutes', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('alert_rules', sa.Column('trend_multiplier', sa.Float(), server_default='5.0', nullable=False))
+    op.add_column('alert_rules', sa.Column('trend_min_count', sa.Integer(), server_default='10', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('alert_rules', 'trend_min_count')
+    op.drop_column('alert_rules', 'trend_multiplier')
+    op.drop_column('alert_rules', 'trend_window_minutes')
+    op.drop_column('alert_rules', 'trend_terms')
@@ -0,0 +1,26 @@
+"""Add digests last_post_id
+
+Revision ID: 6e1b9d4a7c28
+Revises: d2c8f5a1b736
+Create Date: 2026-10-19 22:24:09.518372
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e1b9d4a7c28'
+down_revision: Union[str, None] = 'd2c8f5a1b736'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('digests', sa.Column('last_post_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('digests', 'last_post_id')
@@ -0,0 +1,35 @@
+"""Add posts text trigram index
+
+Revision ID: 6f3a2b8c1d49
+Revises: 4b0c9d7e5f82
+Create Date: 2026-10-19 14:37:12.408593
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f3a2b8c1d49'
+down_revision: Union[str, None] = '4b0c9d7e5f82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Serves case-insensitive keyword (ILIKE '%kw%') lookups, e.g. rule backtests
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_posts_text_trgm', 'posts', ['text'], unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'text': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_posts_text_trgm', table_name='posts', postgresql_concurrently=True)
@@ -0,0 +1,43 @@
+"""Add digest states
+
+Revision ID: 7a3d5c1e9b62
+Revises: 1f9c4e7a2d58
+Create Date: 2026-10-19 19:26:14.083519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3d5c1e9b62'
+down_revision: Union[str, None] = '1f9c4e7a2d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'digest_states',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('digest_date', sa.Date(), nullable=False),
+        sa.Column('last_post_id', sa.Integer(), nullable=False),
+        sa.Column('posts_seen', sa.Integer(), nullable=False),
+        sa.Column('clusters', sa.JSON(), nullable=False),
+        sa.Column('topic_posts', sa.JSON(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'digest_date', name='uix_digest_state_user_date'),
+    )
+    op.create_index(op.f('ix_digest_states_id'), 'digest_states', ['id'], unique=False)
+    op.create_index(op.f('ix_digest_states_user_id'), 'digest_states', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_digest_states_user_id'), table_name='digest_states')
+    op.drop_index(op.f('ix_digest_states_id'), table_name='digest_states')
+    op.drop_table('digest_states')
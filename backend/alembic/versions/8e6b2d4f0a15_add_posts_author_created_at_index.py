@@ -0,0 +1,32 @@
+"""Add posts author_id, created_at index
+
+Revision ID: 8e6b2d4f0a15
+Revises: 5d1e7b3a9c04
+Create Date: 2026-10-19 18:34:06.518249
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e6b2d4f0a15'
+down_revision: Union[str, None] = '5d1e7b3a9c04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Serves the per-author "latest N posts" window query used by digests
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_posts_author_id_created_at', 'posts', ['author_id', 'created_at'], unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_posts_author_id_created_at', table_name='posts', postgresql_concurrently=True)
@@ -0,0 +1,46 @@
+"""Add alert outbox
+
+Revision ID: 9a41d6e2c7b3
+Revises: 3c8e1f0a9b24
+Create Date: 2026-10-19 10:03:17.552904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a41d6e2c7b3'
+down_revision: Union[str, None] = '3c8e1f0a9b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'alert_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('alert_log_id', sa.Integer(), nullable=False),
+        sa.Column('channel', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('claimed_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('delivered_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['alert_log_id'], ['alerts_log.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('alert_log_id')
+    )
+    op.create_index(op.f('ix_alert_outbox_id'), 'alert_outbox', ['id'], unique=False)
+    op.create_index('ix_alert_outbox_status_next_attempt_at', 'alert_outbox', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alert_outbox_status_next_attempt_at', table_name='alert_outbox')
+    op.drop_index(op.f('ix_alert_outbox_id'), table_name='alert_outbox')
+    op.drop_table('alert_outbox')
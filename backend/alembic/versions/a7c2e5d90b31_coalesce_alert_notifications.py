@@ -0,0 +1,58 @@
+"""Coalesce alert notifications
+
+Revision ID: a7c2e5d90b31
+Revises: 6f3a2b8c1d49
+Create Date: 2026-10-19 16:02:48.317520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c2e5d90b31'
+down_revision: Union[str, None] = '6f3a2b8c1d49'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('alert_rules', sa.Column('coalesce_minutes', sa.Integer(), server_default='0', nullable=False))
+
+    # An outbox entry can now carry several alerts: move the link onto alerts_log
+    op.add_column('alerts_log', sa.Column('outbox_id', sa.Integer(), nullable=True))
+    op.execute("UPDATE alerts_log SET outbox_id = o.id FROM alert_outbox o WHERE o.alert_log_id = alerts_log.id")
+    op.create_index(op.f('ix_alerts_log_outbox_id'), 'alerts_log', ['outbox_id'], unique=False)
+    op.create_foreign_key('alerts_log_outbox_id_fkey', 'alerts_log', 'alert_outbox', ['outbox_id'], ['id'])
+    op.drop_constraint('alert_outbox_alert_log_id_key', 'alert_outbox', type_='unique')
+    op.drop_constraint('alert_outbox_alert_log_id_fkey', 'alert_outbox', type_='foreignkey')
+    op.drop_column('alert_outbox', 'alert_log_id')
+
+    op.add_column('alert_outbox', sa.Column('coalesce_key', sa.String(length=100), nullable=True))
+    op.create_index(
+        'ix_alert_outbox_open_coalesce_key', 'alert_outbox', ['coalesce_key'], unique=False,
+        postgresql_where=sa.text("status = 'pending' AND attempts = 0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alert_outbox_open_coalesce_key', table_name='alert_outbox')
+    op.drop_column('alert_outbox', 'coalesce_key')
+
+    # Coalesced entries keep only their first alert
+    op.add_column('alert_outbox', sa.Column('alert_log_id', sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE alert_outbox SET alert_log_id = "
+        "(SELECT MIN(id) FROM alerts_log WHERE alerts_log.outbox_id = alert_outbox.id)"
+    )
+    op.execute("DELETE FROM alert_outbox WHERE alert_log_id IS NULL")
+    op.alter_column('alert_outbox', 'alert_log_id', nullable=False)
+    op.create_foreign_key('alert_outbox_alert_log_id_fkey', 'alert_outbox', 'alerts_log', ['alert_log_id'], ['id'])
+    op.create_unique_constraint('alert_outbox_alert_log_id_key', 'alert_outbox', ['alert_log_id'])
+    op.drop_constraint('alerts_log_outbox_id_fkey', 'alerts_log', type_='foreignkey')
+    op.drop_index(op.f('ix_alerts_log_outbox_id'), table_name='alerts_log')
+    op.drop_column('alerts_log', 'outbox_id')
+
+    op.drop_column('alert_rules', 'coalesce_minutes')
@@ -0,0 +1,26 @@
+"""Add alert_outbox claim_token
+
+Revision ID: a9d4e7b2c615
+Revises: f3a7c1d9e582
+Create Date: 2026-10-19 21:37:20.184529
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d4e7b2c615'
+down_revision: Union[str, None] = 'f3a7c1d9e582'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('alert_outbox', sa.Column('claim_token', sa.String(length=36), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('alert_outbox', 'claim_token')
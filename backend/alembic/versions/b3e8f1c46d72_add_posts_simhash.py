@@ -0,0 +1,38 @@
+"""Add posts simhash
+
+Revision ID: b3e8f1c46d72
+Revises: a7c2e5d90b31
+Create Date: 2026-10-19 17:20:09.845126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e8f1c46d72'
+down_revision: Union[str, None] = 'a7c2e5d90b31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing posts are left without a fingerprint; only new posts are matched
+    op.add_column('posts', sa.Column('simhash', sa.BigInteger(), nullable=True))
+    op.add_column('posts', sa.Column('simhash_bands', postgresql.ARRAY(sa.Integer()), nullable=True))
+    op.add_column('posts', sa.Column('duplicate_of_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('posts_duplicate_of_id_fkey', 'posts', 'posts', ['duplicate_of_id'], ['id'])
+    op.create_index(op.f('ix_posts_duplicate_of_id'), 'posts', ['duplicate_of_id'], unique=False)
+    op.create_index('ix_posts_simhash_bands', 'posts', ['simhash_bands'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_posts_simhash_bands', table_name='posts')
+    op.drop_index(op.f('ix_posts_duplicate_of_id'), table_name='posts')
+    op.drop_constraint('posts_duplicate_of_id_fkey', 'posts', type_='foreignkey')
+    op.drop_column('posts', 'duplicate_of_id')
+    op.drop_column('posts', 'simhash_bands')
+    op.drop_column('posts', 'simhash')
@@ -0,0 +1,42 @@
+"""Add posts user_id
+
+Revision ID: b5e2a9c7d410
+Revises: 4b8f1d6e2c93
+Create Date: 2026-10-19 20:41:15.276083
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e2a9c7d410'
+down_revision: Union[str, None] = '4b8f1d6e2c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Tenant owning the post, copied from its monitored account so vector search
+    # can filter posts without a join
+    op.add_column('posts', sa.Column('user_id', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE posts p
+        SET user_id = m.user_id
+        FROM monitored_accounts m
+        WHERE p.author_id = m.id
+    """)
+    op.alter_column('posts', 'user_id', nullable=False)
+    op.create_foreign_key('posts_user_id_fkey', 'posts', 'users', ['user_id'], ['id'])
+
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_posts_user_id'), 'posts', ['user_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_posts_user_id'), table_name='posts', postgresql_concurrently=True)
+    op.drop_constraint('posts_user_id_fkey', 'posts', type_='foreignkey')
+    op.drop_column('posts', 'user_id')
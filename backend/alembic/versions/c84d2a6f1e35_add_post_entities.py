@@ -0,0 +1,58 @@
+"""Add post entities
+
+Revision ID: c84d2a6f1e35
+Revises: b3e8f1c46d72
+Create Date: 2026-10-19 17:48:31.207615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c84d2a6f1e35'
+down_revision: Union[str, None] = 'b3e8f1c46d72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (kind, pattern, normalizer); mirrors app.services.entities for text-only backfill
+BACKFILL = [
+    ('cashtag', r'(^|[^\w$])\$([A-Za-z][A-Za-z0-9]{0,9})\M', 'upper'),
+    ('hashtag', r'(^|[^\w#])#(\w{1,100})', 'lower'),
+    ('mention', r'(^|[^\w@])@(\w{1,15})', 'lower'),
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'post_entities',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('value', sa.String(length=255), nullable=False),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('post_id', 'kind', 'value', name='uix_post_entity'),
+    )
+    op.create_index(op.f('ix_post_entities_id'), 'post_entities', ['id'], unique=False)
+    op.create_index(op.f('ix_post_entities_post_id'), 'post_entities', ['post_id'], unique=False)
+    op.create_index('ix_post_entities_kind_value_post_id', 'post_entities', ['kind', 'value', 'post_id'], unique=False)
+
+    for kind, pattern, normalizer in BACKFILL:
+        op.execute(
+            sa.text(f"""
+                INSERT INTO post_entities (post_id, kind, value)
+                SELECT DISTINCT p.id, :kind, {normalizer}(m[2])
+                FROM posts p, regexp_matches(p.text, :pattern, 'g') AS m
+                ON CONFLICT DO NOTHING
+            """).bindparams(kind=kind, pattern=pattern)
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_post_entities_kind_value_post_id', table_name='post_entities')
+    op.drop_index(op.f('ix_post_entities_post_id'), table_name='post_entities')
+    op.drop_index(op.f('ix_post_entities_id'), table_name='post_entities')
+    op.drop_table('post_entities')
@@ -0,0 +1,28 @@
+"""Add posts alert check failure tracking
+
+Revision ID: d2c8f5a1b736
+Revises: a9d4e7b2c615
+Create Date: 2026-10-19 21:58:41.730264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2c8f5a1b736'
+down_revision: Union[str, None] = 'a9d4e7b2c615'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('posts', sa.Column('alert_check_failures', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('posts', sa.Column('alert_check_error', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('posts', 'alert_check_error')
+    op.drop_column('posts', 'alert_check_failures')
@@ -0,0 +1,38 @@
+"""Add summary cache
+
+Revision ID: d5b7e3a18f60
+Revises: 9a41d6e2c7b3
+Create Date: 2026-10-19 11:26:02.734118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b7e3a18f60'
+down_revision: Union[str, None] = '9a41d6e2c7b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'summary_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('max_sentences', sa.Integer(), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('content_hash', 'model', 'max_sentences', name='uix_summary_cache_key')
+    )
+    op.create_index(op.f('ix_summary_cache_id'), 'summary_cache', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_summary_cache_id'), table_name='summary_cache')
+    op.drop_table('summary_cache')
@@ -0,0 +1,33 @@
+"""Add alerts_log summary
+
+Revision ID: e2f94c6b0a17
+Revises: d5b7e3a18f60
+Create Date: 2026-10-19 12:08:55.190426
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2f94c6b0a17'
+down_revision: Union[str, None] = 'd5b7e3a18f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('alerts_log', sa.Column('summary', sa.Text(), nullable=True))
+    # Existing alerts have no summary to backfill; mark them done so the summary job skips them
+    op.execute("UPDATE alerts_log SET summary = '' WHERE summary IS NULL")
+    op.create_index(
+        'ix_alerts_log_pending_summary', 'alerts_log', ['sent_at'], unique=False,
+        postgresql_where=sa.text('summary IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_log_pending_summary', table_name='alerts_log')
+    op.drop_column('alerts_log', 'summary')
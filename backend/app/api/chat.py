@@ -1,4 +1,5 @@
 """Chat endpoints."""
+from typing import Callable
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
@@ -6,8 +7,10 @@ from app.database import get_db
 from app.services.rag import RAGService
 from app.services.embeddings import EmbeddingsService
 from app.services.llm import LLMService
-from app.models import User
+from app.models import ChatMessage, User
+from app.schemas import ChatMessageResponse
 from app.api.deps import get_current_user
+from app.api.streaming import stream_llm_response
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -34,4 +37,39 @@ def chat(
     return result
 
 
+@router.post("/stream")
+def chat_stream(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Answer a question as Server-Sent Events.
+
+    Streams "token" events while the answer is generated, then a "done" event with
+    the full answer, citations and posts. The exchange is saved to chat history.
+    """
+    user_id = current_user.id
+
+    def work(db: Session, on_token: Callable[[str], None]):
+        service = RAGService(db, EmbeddingsService(), LLMService())
+        return service.chat(request.question, user_id=user_id, on_token=on_token)
 
+    return stream_llm_response(work)
+
+
+@router.get("/history", response_model=list[ChatMessageResponse])
+def chat_history(
+    skip: int = 0,
+    limit: int = 50,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """List the current user's past questions and answers, newest first."""
+    return (
+        db.query(ChatMessage)
+        .filter(ChatMessage.user_id == current_user.id)
+        .order_by(ChatMessage.created_at.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
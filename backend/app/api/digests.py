@@ -1,17 +1,20 @@
 """Digest endpoints."""
-from typing import Optional
+from typing import Callable, Optional
 from datetime import date
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models import Digest, User
-from app.schemas import DigestResponse
+from app.config import settings
+from app.models import Digest, Setting, User
+from app.schemas import DigestResponse, DigestSchedule, DigestScheduleUpdate
 from app.services.digest import DigestService
+from app.services.digest_runner import DIGEST_TIME_KEY, TIMEZONE_KEY, parse_digest_time, parse_timezone
 from app.services.llm import LLMService
 from app.notifiers.log import LogNotifier
 from app.services.ingestion import IngestionService
 from app.services.x_client import XClient
 from app.api.deps import get_current_user, get_x_client
+from app.api.streaming import stream_llm_response
 
 router = APIRouter(prefix="/digests", tags=["digests"])
 
@@ -49,6 +52,77 @@ def run_digest(
         raise HTTPException(status_code=500, detail=f"Failed to generate digest: {str(e)}")
 
 
+@router.post("/run/stream")
+def run_digest_stream(
+    digest_date: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+    x_client: XClient = Depends(get_x_client),
+):
+    """
+    Run ingestion and digest generation, streaming the digest as Server-Sent Events.
+
+    Streams "token" events while the LLM writes the digest, then a "done" event with
+    the stored digest. A digest reused or assembled without the LLM arrives whole in
+    "done".
+    """
+    user_id = current_user.id
+
+    def work(db: Session, on_token: Callable[[str], None]):
+        IngestionService(x_client, db).ingest_user_accounts(user_id)
+        service = DigestService(db, LLMService(), LogNotifier())
+        digest = service.generate_digest(user_id=user_id, digest_date=digest_date, force=True, on_token=on_token)
+        return DigestResponse.model_validate(digest).model_dump(mode="json")
+
+    return stream_llm_response(work)
+
+
+@router.get("/schedule", response_model=DigestSchedule)
+def get_digest_schedule(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Get the current user's local digest time and timezone."""
+    values = {
+        setting.key: setting.value
+        for setting in db.query(Setting).filter(
+            Setting.user_id == current_user.id,
+            Setting.key.in_([DIGEST_TIME_KEY, TIMEZONE_KEY]),
+        )
+    }
+    return DigestSchedule(
+        digest_time=values.get(DIGEST_TIME_KEY, settings.digest_time),
+        timezone=values.get(TIMEZONE_KEY, settings.timezone),
+    )
+
+
+@router.put("/schedule", response_model=DigestSchedule)
+def update_digest_schedule(
+    update: DigestScheduleUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Set the current user's local digest time and/or timezone."""
+    try:
+        if update.digest_time is not None:
+            parse_digest_time(update.digest_time)
+        if update.timezone is not None:
+            parse_timezone(update.timezone)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    for key, value in ((DIGEST_TIME_KEY, update.digest_time), (TIMEZONE_KEY, update.timezone)):
+        if value is None:
+            continue
+        setting = db.query(Setting).filter(Setting.user_id == current_user.id, Setting.key == key).first()
+        if setting:
+            setting.value = value
+        else:
+            db.add(Setting(user_id=current_user.id, key=key, value=value))
+    db.commit()
+    
+    return get_digest_schedule(db=db, current_user=current_user)
+
+
 @router.get("/latest", response_model=DigestResponse)
 def get_latest_digest(
     db: Session = Depends(get_db),
@@ -8,7 +8,10 @@ from app.schemas import (
     AlertRuleCreate,
     AlertRuleUpdate,
     AlertRuleResponse,
+    AlertRuleBacktestRequest,
+    AlertRuleBacktestResponse,
 )
+from app.services.backtest import RuleBacktester
 from app.api.deps import get_current_user
 
 router = APIRouter(prefix="/rules", tags=["rules"])
@@ -37,6 +40,11 @@ def create_rule(
         allowed_author_ids=rule.allowed_author_ids,
         similarity_threshold=rule.similarity_threshold,
         cooldown_minutes=rule.cooldown_minutes,
+        coalesce_minutes=rule.coalesce_minutes,
+        trend_terms=rule.trend_terms,
+        trend_window_minutes=rule.trend_window_minutes,
+        trend_multiplier=rule.trend_multiplier,
+        trend_min_count=rule.trend_min_count,
         channel=rule.channel,
         user_id=current_user.id,
     )
@@ -47,6 +55,30 @@ def create_rule(
     return db_rule
 
 
+@router.post("/backtest", response_model=AlertRuleBacktestResponse)
+def backtest_rule(
+    request: AlertRuleBacktestRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Evaluate a draft rule against the current user's historical posts."""
+    if request.end <= request.start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    
+    backtester = RuleBacktester(db)
+    return backtester.backtest(
+        user_id=current_user.id,
+        start=request.start,
+        end=request.end,
+        keywords=request.keywords,
+        topic_ids=request.topic_ids,
+        allowed_author_ids=request.allowed_author_ids,
+        similarity_threshold=request.similarity_threshold,
+        cooldown_minutes=request.cooldown_minutes,
+        sample_size=request.sample_size,
+    )
+
+
 @router.get("", response_model=List[AlertRuleResponse])
 def list_rules(
     db: Session = Depends(get_db),
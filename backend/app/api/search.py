@@ -1,5 +1,5 @@
 """Search endpoints."""
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
@@ -23,11 +23,12 @@ def get_rag_service(db: Session = Depends(get_db)) -> RAGService:
 def search_posts(
     query: str = Query(..., description="Search query"),
     limit: int = Query(default=10, ge=1, le=50),
+    mode: Optional[str] = Query(default=None, pattern="^(hybrid|vector|lexical)$", description="Retrieval mode"),
     service: RAGService = Depends(get_rag_service),
     current_user: User = Depends(get_current_user),
 ):
-    """Search posts using vector similarity for the current user."""
-    results = service.search(query, user_id=current_user.id, limit=limit)
+    """Search the current user's posts with full-text and/or vector retrieval."""
+    results = service.search(query, user_id=current_user.id, limit=limit, mode=mode)
     return {"query": query, "results": results}
 
 
@@ -0,0 +1,58 @@
+"""Server-Sent Events responses for streamed LLM output."""
+import json
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator
+import structlog
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+
+logger = structlog.get_logger()
+
+_DONE = object()
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one SSE event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def stream_llm_response(work: Callable[[Session, Callable[[str], None]], Dict[str, Any]]) -> StreamingResponse:
+    """
+    Run work in a background thread and stream its tokens as SSE.
+
+    work gets its own session (request-scoped sessions are closed before the body
+    streams) and an on_token callback. Each token is sent as a "token" event
+    ({"text": ...}); the dict work returns is sent as a final "done" event, or an
+    "error" event if it raises. The client sees the first token as soon as the
+    model produces it, while the full result is still stored by work itself.
+    """
+    events: "queue.Queue[Any]" = queue.Queue()
+
+    def run() -> None:
+        db = SessionLocal()
+        try:
+            result = work(db, lambda text: events.put(("token", {"text": text})))
+            events.put(("done", result))
+        except Exception as e:
+            logger.error("Streamed request failed", error=str(e))
+            events.put(("error", {"detail": str(e)}))
+        finally:
+            db.close()
+            events.put(_DONE)
+
+    def body() -> Iterator[str]:
+        threading.Thread(target=run, daemon=True).start()
+        while True:
+            item = events.get()
+            if item is _DONE:
+                return
+            event, data = item
+            yield sse_event(event, data)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
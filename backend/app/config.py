@@ -1,6 +1,6 @@
 """Configuration management using Pydantic Settings."""
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Optional, Dict, List
 
 
 class Settings(BaseSettings):
@@ -27,12 +27,82 @@ class Settings(BaseSettings):
 
     # Scheduler settings
     polling_interval_minutes: int = 15
-    digest_time: str = "09:00"  # HH:MM format
-    timezone: str = "America/New_York"
+    digest_time: str = "09:00"  # HH:MM format; default for users without a "digest_time" setting
+    timezone: str = "America/New_York"  # Default for users without a "timezone" setting
+    digest_schedule_interval_minutes: int = 5  # How often due digests are looked for
+    digest_jitter_minutes: int = 30  # Per-user offset after digest_time, spreads load
+    digest_max_workers: int = 8  # Tenants whose digests are generated concurrently
+    digest_progress_every: int = 100  # Log progress after this many tenants
+
+    # Near-duplicate handling at ingestion: any of reuse_embedding, skip_alerts, collapse_digest
+    near_duplicate_policy: List[str] = ["reuse_embedding"]
+    near_duplicate_max_distance: int = 3  # SimHash bits; must stay below the 4 bands
+    near_duplicate_window_days: int = 7
+
+    # Alert evaluation
+    # check_posts never sees more than alert_batch_size posts, so alert_parallel_min_posts must not
+    # exceed it or the process pool is never used
+    alert_batch_size: int = 200  # Posts per check_posts call
+    alert_eval_workers: int = 4  # Processes for tenant-sharded evaluation; 1 evaluates in-process
+    alert_parallel_min_posts: int = 100  # Smaller batches are evaluated in-process; keep <= alert_batch_size
+    alert_check_max_failures: int = 3  # A post that fails this many checks on its own is marked checked with an error
+
+    # Trend detection (per-tenant count-min sketches over time buckets)
+    trend_bucket_minutes: int = 10
+    trend_baseline_hours: int = 24
+    trend_sketch_width: int = 1024  # Memory per tenant: buckets * depth * width * 4 bytes
+    trend_sketch_depth: int = 4
+    trend_max_tenants: int = 1000  # Sketches kept in memory; the least recently observed tenant is evicted beyond this
+
+    # Alert delivery (outbox dispatcher)
+    dispatch_interval_seconds: int = 10
+    dispatch_max_workers: int = 16
+    dispatch_channel_concurrency: Dict[str, int] = {"default": 4, "log": 16}
+    dispatch_max_attempts: int = 5
+    dispatch_backoff_seconds: int = 30
+    dispatch_lease_seconds: int = 300
+
+    # Webhook notifier
+    webhook_url: str = ""  # Default endpoint; users can override with a "webhook_url" setting
+    webhook_secret: str = ""  # HMAC-SHA256 signing key, unsigned if empty
+    webhook_timeout_seconds: float = 5.0
+    webhook_batch_window_ms: int = 0  # 0 disables batching
+    webhook_max_batch_size: int = 50
+    webhook_max_connections: int = 100
+    webhook_max_connections_per_host: int = 10
+    webhook_max_retries: int = 2  # Extra attempts on 5xx or connection errors, before the outbox retry takes over
+    webhook_retry_backoff_ms: int = 200  # Doubles on each retry
 
     # AI Model settings
     embedding_model: str = "text-embedding-3-small"
     llm_model: str = "gpt-4-turbo-preview"
+    summary_cache_size: int = 10000  # In-process LRU entries
+    summary_inflight_timeout_seconds: float = 60.0
+    alert_summary_mode: str = "two_phase"  # two_phase (notify first, LLM summary after) or inline
+    summary_interval_seconds: int = 30
+
+    # Search
+    search_mode: str = "hybrid"  # hybrid (full-text + vector, rank-fused), vector or lexical
+    hybrid_search_candidates: int = 30  # Posts each retriever ranks before fusion
+    hybrid_search_rrf_k: int = 60  # Reciprocal rank fusion constant; higher flattens rank differences
+
+    # Vector search (HNSW index on posts.embedding)
+    vector_search_ef_search: int = 100  # Candidate list size per query; higher improves recall, costs latency
+    vector_search_iterative_scan: str = "relaxed_order"  # off, strict_order or relaxed_order (pgvector >= 0.8)
+    vector_search_max_scan_tuples: int = 20000  # Stop an iterative scan after visiting this many index tuples
+
+    # Digest prompt budgets (tokens, counted with the model's tokenizer)
+    digest_post_max_tokens: int = 80  # Per post in a prompt
+    digest_prompt_max_tokens: int = 6000  # Larger inputs are summarized map-reduce
+    digest_section_max_tokens: int = 300  # Output of each map call
+    digest_max_tokens: int = 2000  # Output of the final digest
+    digest_map_workers: int = 8  # Concurrent map calls per digest
+    digest_cluster_threshold: float = 0.85  # Cosine similarity for posts to share a digest entry; 1.0 disables
+    digest_mode: str = "full"  # full (built at digest time) or incremental (rolling state updated on ingestion)
+    digest_rolling_batch_size: int = 500  # Posts folded into the rolling state per query
+    digest_rolling_max_clusters: int = 500  # Smallest clusters are dropped beyond this
+    digest_top_clusters: int = 20  # Stories listed in an incremental digest
+    digest_top_posts_per_topic: int = 5
 
     # Security
     secret_key: str = "your-secret-key-should-be-changed-in-production"
@@ -1,13 +1,13 @@
 """SQLAlchemy models for PingLet."""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey, Date, Float
+from sqlalchemy import Column, Computed, Integer, BigInteger, String, Boolean, DateTime, Text, JSON, ForeignKey, Date, Float
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, ARRAY, TSVECTOR
 from pgvector.sqlalchemy import Vector
 from app.database import Base
 
 
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, Index, text as sql_text
 
 class MonitoredAccount(Base):
     """Monitored X (Twitter) account."""
@@ -39,19 +39,55 @@ class Post(Base):
     id = Column(Integer, primary_key=True, index=True)
     x_post_id = Column(String(255), nullable=False, unique=False, index=True)
     author_id = Column(Integer, ForeignKey("monitored_accounts.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)  # Owner of the author, for join-free tenant filters
     created_at = Column(DateTime, nullable=False, index=True)
     text = Column(Text, nullable=False)
+    search_vector = Column(TSVECTOR, Computed("to_tsvector('english', text)", persisted=True))  # Full-text search
     url = Column(String(512), nullable=True)
     raw_json = Column(JSONB, nullable=True)
     embedding = Column(Vector(1536), nullable=True)  # OpenAI text-embedding-3-small dimension
     stored_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    alerts_checked_at = Column(DateTime, nullable=True)  # Set once the post has been evaluated against alert rules
+    alert_check_failures = Column(Integer, default=0, server_default="0", nullable=False)  # Failed alert checks of this post alone
+    alert_check_error = Column(Text, nullable=True)  # Last error if the post was given up on after alert_check_max_failures
+    simhash = Column(BigInteger, nullable=True)  # 64-bit SimHash of the text (signed)
+    simhash_bands = Column(ARRAY(Integer), nullable=True)  # Position-tagged 16-bit bands for near-duplicate lookup
+    duplicate_of_id = Column(Integer, ForeignKey("posts.id"), nullable=True, index=True)  # Original post if near-duplicate
 
     # Relationships
     author = relationship("MonitoredAccount", back_populates="posts")
     alert_logs = relationship("AlertLog", back_populates="post")
+    entities = relationship("PostEntity", back_populates="post", cascade="all, delete-orphan")
 
     __table_args__ = (
         UniqueConstraint('author_id', 'x_post_id', name='uix_author_xpostid'),
+        Index('ix_posts_alerts_unchecked', 'id', postgresql_where=sql_text('alerts_checked_at IS NULL')),
+        Index('ix_posts_text_trgm', 'text', postgresql_using='gin', postgresql_ops={'text': 'gin_trgm_ops'}),
+        Index('ix_posts_simhash_bands', 'simhash_bands', postgresql_using='gin'),
+        Index('ix_posts_author_id_created_at', 'author_id', 'created_at'),
+        Index('ix_posts_search_vector', 'search_vector', postgresql_using='gin'),
+        Index(
+            'ix_posts_embedding_hnsw', 'embedding', postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'vector_cosine_ops'},
+        ),
+    )
+
+
+class PostEntity(Base):
+    """Cashtag, hashtag or mention found in a post."""
+    __tablename__ = "post_entities"
+
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(String(20), nullable=False)  # cashtag, hashtag, mention
+    value = Column(String(255), nullable=False)  # Normalized: cashtags upper case, others lower case
+
+    post = relationship("Post", back_populates="entities")
+
+    __table_args__ = (
+        UniqueConstraint('post_id', 'kind', 'value', name='uix_post_entity'),
+        Index('ix_post_entities_kind_value_post_id', 'kind', 'value', 'post_id'),
     )
 
 
@@ -72,7 +108,7 @@ class Topic(Base):
 
 
 class AlertRule(Base):
-    """Alert rule for keyword/topic matching."""
+    """Alert rule for keyword/topic matching and entity trends."""
     __tablename__ = "alert_rules"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -84,6 +120,11 @@ class AlertRule(Base):
     allowed_author_ids = Column(JSON, nullable=True)  # List of author IDs (allowlist)
     similarity_threshold = Column(Float, default=0.7, nullable=False)
     cooldown_minutes = Column(Integer, default=60, nullable=False)
+    coalesce_minutes = Column(Integer, default=0, nullable=False)  # Combine alerts within this window into one notification (0 = off)
+    trend_terms = Column(JSON, nullable=True)  # List of entities like "$SOL", "#ai", "@user"; empty = any entity
+    trend_window_minutes = Column(Integer, default=0, nullable=False)  # Burst window for trend triggers (0 = off)
+    trend_multiplier = Column(Float, default=5.0, nullable=False)  # Window count vs. baseline rate
+    trend_min_count = Column(Integer, default=10, nullable=False)
     channel = Column(String(50), default="log", nullable=False)  # log, email, telegram, webhook
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -100,14 +141,63 @@ class AlertLog(Base):
     id = Column(Integer, primary_key=True, index=True)
     rule_id = Column(Integer, ForeignKey("alert_rules.id"), nullable=False, index=True)
     post_id = Column(Integer, ForeignKey("posts.id"), nullable=False, index=True)
-    trigger_type = Column(String(50), nullable=False)  # keyword, topic
+    trigger_type = Column(String(50), nullable=False)  # keyword, topic, trend
     score = Column(Float, nullable=True)  # Similarity score for topic matches
-    status = Column(String(50), default="sent", nullable=False)  # sent, failed
+    status = Column(String(50), default="sent", nullable=False)  # pending, sent, failed
+    summary = Column(Text, nullable=True)  # LLM summary, filled in after delivery in two-phase mode
+    outbox_id = Column(Integer, ForeignKey("alert_outbox.id"), nullable=True, index=True)
     sent_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
     rule = relationship("AlertRule", back_populates="alert_logs")
     post = relationship("Post", back_populates="alert_logs")
+    outbox = relationship("AlertOutbox", back_populates="alert_logs")
+
+    __table_args__ = (
+        Index('ix_alerts_log_rule_id_sent_at', 'rule_id', 'sent_at'),
+        Index('ix_alerts_log_pending_summary', 'sent_at', postgresql_where=sql_text('summary IS NULL')),
+    )
+
+
+class AlertOutbox(Base):
+    """Pending alert notification, written in the same transaction as its AlertLogs."""
+    __tablename__ = "alert_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    channel = Column(String(50), nullable=False)
+    coalesce_key = Column(String(100), nullable=True)  # "rule_id:channel" while the entry can still absorb alerts
+    payload = Column(JSON, nullable=False)  # summary and trigger_info for the notifier
+    status = Column(String(50), default="pending", nullable=False)  # pending, processing, sent, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    claimed_at = Column(DateTime, nullable=True)
+    claim_token = Column(String(36), nullable=True)  # Set on each claim; only its holder may record the outcome
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    delivered_at = Column(DateTime, nullable=True)
+
+    alert_logs = relationship("AlertLog", back_populates="outbox", order_by="AlertLog.id")
+
+    __table_args__ = (
+        Index('ix_alert_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+        Index('ix_alert_outbox_open_coalesce_key', 'coalesce_key', postgresql_where=sql_text("status = 'pending' AND attempts = 0")),
+    )
+
+
+class SummaryCacheEntry(Base):
+    """Cached LLM summary of post text."""
+    __tablename__ = "summary_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False)  # sha256 of normalized text
+    model = Column(String(100), nullable=False)
+    max_sentences = Column(Integer, nullable=False)
+    summary = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('content_hash', 'model', 'max_sentences', name='uix_summary_cache_key'),
+    )
 
 
 class Digest(Base):
@@ -118,10 +208,52 @@ class Digest(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     digest_date = Column(Date, nullable=False, unique=False, index=True)
     content_markdown = Column(Text, nullable=False)
+    input_fingerprint = Column(String(64), nullable=True)  # SHA-256 of the inputs; None if content was a fallback
+    last_post_id = Column(Integer, nullable=True)  # Incremental mode: last post folded into the state it was assembled from
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     user = relationship("User", back_populates="digests")
 
+    __table_args__ = (
+        Index('ix_digests_user_id_input_fingerprint', 'user_id', 'input_fingerprint'),
+    )
+
+
+class DigestState(Base):
+    """Rolling digest for a user's day, updated every ingestion cycle."""
+    __tablename__ = "digest_states"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    digest_date = Column(Date, nullable=False)
+    last_post_id = Column(Integer, default=0, nullable=False)  # Posts up to this id are included
+    posts_seen = Column(Integer, default=0, nullable=False)
+    # [{rep, author, url, summary, post_ids, authors}]; rep is the representative post id
+    clusters = Column(JSON, nullable=False, default=list)
+    # {topic_id: [[post_id, score], ...]}, best first
+    topic_posts = Column(JSON, nullable=False, default=dict)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    user = relationship("User")
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'digest_date', name='uix_digest_state_user_date'),
+    )
+
+
+class ChatMessage(Base):
+    """A chat question and its answer."""
+    __tablename__ = "chat_messages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    question = Column(Text, nullable=False)
+    answer = Column(Text, nullable=False)
+    citations = Column(JSON, nullable=False, default=list)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    user = relationship("User")
+
 
 class Setting(Base):
     """Application settings (multi-tenant)."""
@@ -1,6 +1,6 @@
 """Base notifier interface."""
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List
 from app.models import AlertRule, Post
 
 
@@ -29,6 +29,28 @@ class Notifier(ABC):
         """
         pass
 
+    def send_alert_group(
+        self,
+        rule: AlertRule,
+        posts: List[Post],
+        summary: str,
+        trigger_info: Dict[str, Any],
+    ) -> bool:
+        """
+        Send one notification for several posts that matched a coalescing rule.
+        
+        Args:
+            rule: The alert rule that triggered
+            posts: The matching posts, oldest first
+            summary: Summary covering all posts
+            trigger_info: Additional info (count, per-post matches, etc.)
+            
+        Returns:
+            True if sent successfully, False otherwise
+        """
+        # Default: a single alert for the first post, with the rest in trigger_info
+        return self.send_alert(rule, posts[0], summary, {**trigger_info, "post_ids": [post.id for post in posts]})
+
     @abstractmethod
     def send_digest(self, digest_content: str, digest_date: str) -> bool:
         """
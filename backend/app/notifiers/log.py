@@ -1,6 +1,6 @@
 """Log notifier implementation."""
 import structlog
-from typing import Dict, Any
+from typing import Dict, Any, List
 from app.models import AlertRule, Post
 from app.notifiers.base import Notifier
 
@@ -31,6 +31,26 @@ class LogNotifier(Notifier):
         )
         return True
 
+    def send_alert_group(
+        self,
+        rule: AlertRule,
+        posts: List[Post],
+        summary: str,
+        trigger_info: Dict[str, Any],
+    ) -> bool:
+        """Send coalesced alert to log."""
+        logger.info(
+            "ALERT",
+            rule_id=rule.id,
+            rule_name=rule.name,
+            post_ids=[post.id for post in posts],
+            post_urls=[post.url for post in posts],
+            author_ids=sorted({post.author_id for post in posts}),
+            summary=summary,
+            count=len(posts),
+        )
+        return True
+
     def send_digest(self, digest_content: str, digest_date: str) -> bool:
         """Send digest to log."""
         logger.info(
@@ -0,0 +1,233 @@
+"""Webhook notifier implementation."""
+import hashlib
+import hmac
+import json
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit
+import httpx
+import structlog
+from app.config import settings
+from app.models import AlertRule, Post
+from app.notifiers.base import Notifier
+
+logger = structlog.get_logger()
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """Get the process-wide keep-alive HTTP/2 client shared by all webhook notifiers."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=settings.webhook_max_connections,
+                    max_keepalive_connections=settings.webhook_max_connections,
+                ),
+                timeout=httpx.Timeout(settings.webhook_timeout_seconds),
+            )
+        return _client
+
+
+class _PendingBatch:
+    """Alerts waiting to be POSTed together to one endpoint."""
+
+    def __init__(self):
+        self.alerts: List[Dict[str, Any]] = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.success = False
+
+
+class WebhookNotifier(Notifier):
+    """
+    Notifier that POSTs JSON to a webhook endpoint.
+
+    The endpoint is the user's "webhook_url" setting, falling back to
+    settings.webhook_url. With a batch window, concurrent alerts for the same
+    endpoint are combined into one request; every caller blocks until that
+    request completes and gets its result.
+    """
+
+    def __init__(
+        self,
+        default_url: Optional[str] = None,
+        secret: Optional[str] = None,
+        batch_window_ms: Optional[int] = None,
+        max_batch_size: Optional[int] = None,
+        client: Optional[httpx.Client] = None,
+        max_retries: Optional[int] = None,
+        retry_backoff_ms: Optional[int] = None,
+    ):
+        self.default_url = default_url if default_url is not None else settings.webhook_url
+        self.secret = secret if secret is not None else settings.webhook_secret
+        self.batch_window = (batch_window_ms if batch_window_ms is not None else settings.webhook_batch_window_ms) / 1000
+        self.max_batch_size = max_batch_size or settings.webhook_max_batch_size
+        self.client = client or get_http_client()
+        self.max_retries = max_retries if max_retries is not None else settings.webhook_max_retries
+        self.retry_backoff = (retry_backoff_ms if retry_backoff_ms is not None else settings.webhook_retry_backoff_ms) / 1000
+
+        self._batches: Dict[str, _PendingBatch] = {}
+        self._batches_lock = threading.Lock()
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+    def send_alert(
+        self,
+        rule: AlertRule,
+        post: Post,
+        summary: str,
+        trigger_info: Dict[str, Any],
+    ) -> bool:
+        """Send alert to the rule owner's webhook."""
+        url = self._endpoint_for(rule)
+        if not url:
+            logger.warning("No webhook URL configured", rule_id=rule.id, user_id=rule.user_id)
+            return False
+
+        alert = {
+            "delivery_id": trigger_info.get("delivery_id"),
+            "rule": {"id": rule.id, "name": rule.name},
+            "post": self._post_payload(post),
+            "summary": summary,
+            "trigger_type": trigger_info.get("trigger_type"),
+            "score": trigger_info.get("score"),
+        }
+
+        if self.batch_window <= 0:
+            return self._post(url, {"type": "alerts", "alerts": [alert]})
+
+        return self._send_batched(url, alert)
+
+    def send_alert_group(
+        self,
+        rule: AlertRule,
+        posts: List[Post],
+        summary: str,
+        trigger_info: Dict[str, Any],
+    ) -> bool:
+        """Send a coalesced alert listing every matching post."""
+        url = self._endpoint_for(rule)
+        if not url:
+            logger.warning("No webhook URL configured", rule_id=rule.id, user_id=rule.user_id)
+            return False
+
+        alert = {
+            "delivery_id": trigger_info.get("delivery_id"),
+            "rule": {"id": rule.id, "name": rule.name},
+            "posts": [self._post_payload(post) for post in posts],
+            "summary": summary,
+            "matches": trigger_info.get("matches", []),
+        }
+
+        if self.batch_window <= 0:
+            return self._post(url, {"type": "alerts", "alerts": [alert]})
+
+        return self._send_batched(url, alert)
+
+    def send_digest(self, digest_content: str, digest_date: str) -> bool:
+        """Send digest to the default webhook."""
+        if not self.default_url:
+            logger.warning("No webhook URL configured for digests")
+            return False
+        return self._post(self.default_url, {"type": "digest", "digest_date": digest_date, "content": digest_content})
+
+    @staticmethod
+    def _post_payload(post: Post) -> Dict[str, Any]:
+        return {
+            "id": post.id,
+            "x_post_id": post.x_post_id,
+            "author": post.author.username if post.author else None,
+            "text": post.text,
+            "url": post.url,
+            "created_at": post.created_at.isoformat() if post.created_at else None,
+        }
+
+    def _send_batched(self, url: str, alert: Dict[str, Any]) -> bool:
+        """Add the alert to the open batch for the endpoint, flushing it if this caller opened it."""
+        with self._batches_lock:
+            batch = self._batches.get(url)
+            leader = batch is None
+            if leader:
+                batch = _PendingBatch()
+                self._batches[url] = batch
+            batch.alerts.append(alert)
+            if len(batch.alerts) >= self.max_batch_size:
+                # Close the batch so later alerts start a new one
+                del self._batches[url]
+                batch.full.set()
+
+        if not leader:
+            batch.done.wait(self.batch_window + settings.webhook_timeout_seconds * 2)
+            return batch.success
+
+        batch.full.wait(self.batch_window)
+        with self._batches_lock:
+            if self._batches.get(url) is batch:
+                del self._batches[url]
+
+        try:
+            batch.success = self._post(url, {"type": "alerts", "alerts": batch.alerts})
+        finally:
+            batch.done.set()
+        return batch.success
+
+    def _post(self, url: str, payload: Dict[str, Any]) -> bool:
+        """
+        POST a JSON payload, signing it when a secret is configured.
+
+        5xx responses and connection errors are retried with exponential backoff,
+        resending the same body and headers so the Idempotency-Key lets the
+        receiver drop repeats. 4xx responses are not retried.
+        """
+        body = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+
+        delivery_ids = [str(a["delivery_id"]) for a in payload.get("alerts", []) if a.get("delivery_id") is not None]
+        if delivery_ids:
+            headers["Idempotency-Key"] = ",".join(delivery_ids)
+
+        if self.secret:
+            timestamp = str(int(time.time()))
+            signature = hmac.new(self.secret.encode("utf-8"), timestamp.encode("utf-8") + b"." + body, hashlib.sha256)
+            headers["X-PingLet-Timestamp"] = timestamp
+            headers["X-PingLet-Signature"] = f"sha256={signature.hexdigest()}"
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            try:
+                with self._host_semaphore(url):
+                    response = self.client.post(url, content=body, headers=headers)
+                response.raise_for_status()
+                return True
+            except httpx.HTTPStatusError as e:
+                error = str(e)
+                if e.response.status_code < 500:
+                    break
+            except httpx.HTTPError as e:
+                error = str(e)
+            logger.warning("Webhook attempt failed", url=url, attempt=attempt + 1, error=error)
+
+        logger.error("Webhook delivery failed", url=url, error=error)
+        return False
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        """Get the per-host connection limiter."""
+        host = urlsplit(url).netloc
+        with self._batches_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(settings.webhook_max_connections_per_host)
+            return self._host_semaphores[host]
+
+    def _endpoint_for(self, rule: AlertRule) -> Optional[str]:
+        """Resolve the webhook URL from the rule owner's settings."""
+        if rule.user:
+            for setting in rule.user.settings:
+                if setting.key == "webhook_url" and setting.value:
+                    return setting.value
+        return self.default_url or None
@@ -75,6 +75,11 @@ class AlertRuleBase(BaseModel):
     allowed_author_ids: Optional[List[int]] = None
     similarity_threshold: float = Field(default=0.7, ge=0.0, le=1.0)
     cooldown_minutes: int = Field(default=60, ge=0)
+    coalesce_minutes: int = Field(default=0, ge=0)
+    trend_terms: Optional[List[str]] = None
+    trend_window_minutes: int = Field(default=0, ge=0)
+    trend_multiplier: float = Field(default=5.0, gt=0.0)
+    trend_min_count: int = Field(default=10, ge=1)
     channel: str = "log"
 
 
@@ -89,6 +94,11 @@ class AlertRuleUpdate(BaseModel):
     allowed_author_ids: Optional[List[int]] = None
     similarity_threshold: Optional[float] = Field(None, ge=0.0, le=1.0)
     cooldown_minutes: Optional[int] = Field(None, ge=0)
+    coalesce_minutes: Optional[int] = Field(None, ge=0)
+    trend_terms: Optional[List[str]] = None
+    trend_window_minutes: Optional[int] = Field(None, ge=0)
+    trend_multiplier: Optional[float] = Field(None, gt=0.0)
+    trend_min_count: Optional[int] = Field(None, ge=1)
     channel: Optional[str] = None
 
 
@@ -101,6 +111,43 @@ class AlertRuleResponse(AlertRuleBase):
         from_attributes = True
 
 
+class AlertRuleBacktestRequest(BaseModel):
+    keywords: Optional[List[str]] = None
+    topic_ids: Optional[List[int]] = None
+    allowed_author_ids: Optional[List[int]] = None
+    similarity_threshold: float = Field(default=0.7, ge=0.0, le=1.0)
+    cooldown_minutes: int = Field(default=60, ge=0)
+    start: datetime
+    end: datetime
+    sample_size: int = Field(default=10, ge=0, le=100)
+
+
+class BacktestHistogramBin(BaseModel):
+    bin_start: float
+    bin_end: float
+    count: int
+
+
+class BacktestSampleHit(BaseModel):
+    post_id: int
+    author_id: int
+    created_at: datetime
+    text: str
+    url: Optional[str] = None
+    trigger_type: str
+    score: Optional[float] = None
+
+
+class AlertRuleBacktestResponse(BaseModel):
+    posts_scanned: int
+    keyword_matches: int
+    topic_matches: int
+    matches: int
+    would_fire: int
+    histogram: List[BacktestHistogramBin]
+    sample_hits: List[BacktestSampleHit]
+
+
 # Alert Log schemas
 class AlertLogResponse(BaseModel):
     id: int
@@ -109,6 +156,7 @@ class AlertLogResponse(BaseModel):
     trigger_type: str
     score: Optional[float] = None
     status: str
+    summary: Optional[str] = None
     sent_at: datetime
 
     class Config:
@@ -126,6 +174,28 @@ class DigestResponse(BaseModel):
         from_attributes = True
 
 
+class DigestSchedule(BaseModel):
+    digest_time: str = Field(pattern=r"^\d{1,2}:\d{2}$")  # HH:MM, local time
+    timezone: str  # IANA name, e.g. "Europe/Berlin"
+
+
+class DigestScheduleUpdate(BaseModel):
+    digest_time: Optional[str] = Field(None, pattern=r"^\d{1,2}:\d{2}$")
+    timezone: Optional[str] = None
+
+
+# Chat schemas
+class ChatMessageResponse(BaseModel):
+    id: int
+    question: str
+    answer: str
+    citations: List[Dict[str, Any]]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 # X API response schemas (for internal use)
 class XPost(BaseModel):
     """Represents a post from X API."""
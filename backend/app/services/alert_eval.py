@@ -0,0 +1,194 @@
+"""Database-free alert rule evaluation, shardable across processes."""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import structlog
+from app.config import settings
+
+logger = structlog.get_logger()
+
+# A tenant task is a plain, picklable dict:
+#   user_id, now,
+#   posts: [{id, author_id, text, row, entities}]   row indexes the post matrix; entities are trend keys
+#   rules: [{id, keywords, topic_ids, allowed_author_ids, similarity_threshold, cooldown_minutes, coalesce_minutes,
+#            trending}]                        trending: {entity key: ratio} currently bursting for the rule
+#   topics: {topic_id: {row, threshold}}      row indexes the topic matrix
+#   last_alert_at: {(rule_id, author_id): datetime}
+# A match is {post_id, rule_id, trigger_type, score}.
+
+MatrixHandle = Tuple[str, Tuple[int, ...], str]  # (shared memory name, shape, dtype)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def normalized_matrix(vectors: Sequence[Any], dim: int = 1536) -> np.ndarray:
+    """Stack vectors into a row-normalized float32 matrix; missing or zero vectors become zero rows."""
+    matrix = np.zeros((len(vectors), dim), dtype=np.float32)
+    for i, vector in enumerate(vectors):
+        if vector is not None and len(vector) == dim:
+            matrix[i] = np.asarray(vector, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def evaluate_tenant(task: Dict[str, Any], post_matrix: np.ndarray, topic_matrix: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    Evaluate one tenant's posts against its rules.
+
+    Topic scores for all of the tenant's posts and topics come from one matmul;
+    keyword precedence (then topic, then trend), allowlists and cooldowns are
+    then applied in post order.
+    """
+    posts = task["posts"]
+    rules = task["rules"]
+    topics = task["topics"]
+    now: datetime = task["now"]
+    last_alert_at: Dict[Tuple[int, int], datetime] = dict(task["last_alert_at"])
+    if not posts or not rules:
+        return []
+
+    # Best qualifying topic score per (rule, post); 0 where no topic qualifies
+    topic_scores: Dict[int, np.ndarray] = {}
+    topic_ids = sorted({tid for rule in rules for tid in (rule["topic_ids"] or []) if tid in topics})
+    if topic_ids:
+        col_of = {tid: i for i, tid in enumerate(topic_ids)}
+        post_rows = np.array([post["row"] for post in posts])
+        topic_rows = np.array([topics[tid]["row"] for tid in topic_ids])
+        sims = post_matrix[post_rows] @ topic_matrix[topic_rows].T
+        thresholds = np.array([topics[tid]["threshold"] for tid in topic_ids], dtype=np.float32)
+
+        for rule in rules:
+            cols = [col_of[tid] for tid in (rule["topic_ids"] or []) if tid in col_of]
+            if not cols:
+                continue
+            rule_sims = sims[:, cols]
+            passing = (rule_sims >= thresholds[cols]) & (rule_sims >= rule["similarity_threshold"])
+            topic_scores[rule["id"]] = np.where(passing, rule_sims, 0.0).max(axis=1)
+
+    matches = []
+    for i, post in enumerate(posts):
+        text_lower = post["text"].lower()
+        for rule in rules:
+            if rule["allowed_author_ids"] and post["author_id"] not in rule["allowed_author_ids"]:
+                continue
+
+            key = (rule["id"], post["author_id"])
+            # Coalescing rules rate-limit through their notification window instead
+            if rule["cooldown_minutes"] > 0 and not rule["coalesce_minutes"]:
+                last = last_alert_at.get(key)
+                if last is not None and last >= now - timedelta(minutes=rule["cooldown_minutes"]):
+                    continue
+
+            if rule["keywords"] and any(keyword.lower() in text_lower for keyword in rule["keywords"]):
+                trigger_type, score = "keyword", None
+            elif rule["id"] in topic_scores and topic_scores[rule["id"]][i] > 0:
+                trigger_type, score = "topic", float(topic_scores[rule["id"]][i])
+            elif rule["trending"] and any(key in rule["trending"] for key in post["entities"]):
+                trigger_type = "trend"
+                score = max(rule["trending"][key] for key in post["entities"] if key in rule["trending"])
+            else:
+                continue
+
+            last_alert_at[key] = now
+            matches.append({"post_id": post["id"], "rule_id": rule["id"], "trigger_type": trigger_type, "score": score})
+
+    return matches
+
+
+class SharedMatrix:
+    """A numpy matrix copied once into shared memory, attachable by name from other processes."""
+
+    def __init__(self, matrix: np.ndarray):
+        self._shm = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        array = np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=self._shm.buf)
+        array[:] = matrix
+        self.handle: MatrixHandle = (self._shm.name, matrix.shape, matrix.dtype.str)
+
+    def __enter__(self) -> "SharedMatrix":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+
+def _evaluate_shared(args: Tuple[Dict[str, Any], MatrixHandle, MatrixHandle]) -> Dict[str, Any]:
+    """Process pool entry point: attach the shared matrices without copying and evaluate one tenant."""
+    task, post_handle, topic_handle = args
+    segments = []
+    try:
+        matrices = []
+        for name, shape, dtype in (post_handle, topic_handle):
+            shm = shared_memory.SharedMemory(name=name)
+            segments.append(shm)
+            matrices.append(np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf))
+        matches = evaluate_tenant(task, matrices[0], matrices[1])
+        del matrices
+        return {"user_id": task["user_id"], "matches": matches, "error": None}
+    except Exception as e:
+        return {"user_id": task["user_id"], "matches": [], "error": str(e)}
+    finally:
+        for shm in segments:
+            shm.close()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Get the process-wide evaluation pool (spawned, so worker threads in the parent are not forked)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.alert_eval_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def evaluate_tasks(
+    tasks: List[Dict[str, Any]],
+    post_matrix: np.ndarray,
+    topic_matrix: np.ndarray,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Evaluate tenant tasks, across the process pool when the batch is large enough.
+
+    Batches come from check_posts, which is fed at most alert_batch_size posts,
+    so the pool is only used if alert_parallel_min_posts is at or below that.
+
+    Returns:
+        (matches, errors) merged from all tenants
+    """
+    parallel = (
+        settings.alert_eval_workers > 1
+        and len(tasks) > 1
+        and sum(len(task["posts"]) for task in tasks) >= settings.alert_parallel_min_posts
+    )
+
+    if not parallel:
+        outcomes = []
+        for task in tasks:
+            try:
+                outcomes.append({"user_id": task["user_id"], "matches": evaluate_tenant(task, post_matrix, topic_matrix), "error": None})
+            except Exception as e:
+                outcomes.append({"user_id": task["user_id"], "matches": [], "error": str(e)})
+    else:
+        pool = _get_pool()
+        chunksize = max(1, len(tasks) // (settings.alert_eval_workers * 4))
+        with SharedMatrix(post_matrix) as posts_shm, SharedMatrix(topic_matrix) as topics_shm:
+            args = [(task, posts_shm.handle, topics_shm.handle) for task in tasks]
+            outcomes = list(pool.map(_evaluate_shared, args, chunksize=chunksize))
+
+    matches = []
+    errors = []
+    for outcome in outcomes:
+        if outcome["error"]:
+            logger.error("Failed to evaluate tenant alerts", user_id=outcome["user_id"], error=outcome["error"])
+            errors.append({"user_id": outcome["user_id"], "error": outcome["error"]})
+        matches.extend(outcome["matches"])
+    return matches, errors
@@ -1,14 +1,16 @@
 """Alert matching engine."""
-import re
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set, Tuple
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Session, joinedload
 import structlog
-import numpy as np
-from app.models import AlertRule, Post, AlertLog, MonitoredAccount, Topic
+from app.config import settings
+from app.models import AlertRule, Post, AlertLog, AlertOutbox, MonitoredAccount, Topic
 from app.services.embeddings import EmbeddingsService
 from app.services.llm import LLMService
-from app.notifiers.base import Notifier
+from app.services.summary_cache import SummaryCache
+from app.services.alert_eval import normalized_matrix, evaluate_tasks
+from app.services.trends import get_trend_engine, post_entity_keys, term_key
 
 logger = structlog.get_logger()
 
@@ -16,11 +18,17 @@ logger = structlog.get_logger()
 class AlertEngine:
     """Engine for matching posts against alert rules."""
 
-    def __init__(self, db: Session, embeddings_service: EmbeddingsService, llm_service: LLMService, notifier: Notifier):
+    def __init__(self, db: Session, embeddings_service: EmbeddingsService, llm_service: LLMService):
         self.db = db
         self.embeddings_service = embeddings_service
         self.llm_service = llm_service
-        self.notifier = notifier
+        self.summary_cache = SummaryCache(db, llm_service)
+        self._topics: Dict[int, Topic] = {}
+        # Outbox entries still absorbing coalesced alerts, by coalesce key
+        self._open_groups: Dict[str, AlertOutbox] = {}
+        # Latest alert time per (rule_id, author_id), loaded once per engine (i.e. per cycle)
+        self._last_alert_at: Optional[Dict[Tuple[int, int], datetime]] = None
+        self.trend_engine = get_trend_engine()
 
     def check_post(self, post: Post) -> List[Dict[str, Any]]:
         """
@@ -32,148 +40,282 @@ class AlertEngine:
         Returns:
             List of triggered alert info dicts
         """
-        # Get all enabled rules
-        rules = self.db.query(AlertRule).filter(AlertRule.enabled == True).all()
-        
-        triggered = []
-        for rule in rules:
-            result = self._check_rule(post, rule)
-            if result:
-                triggered.append(result)
-        
-        return triggered
+        return self.check_posts([post])["alerts"]
 
-    def _check_rule(self, post: Post, rule: AlertRule) -> Optional[Dict[str, Any]]:
+    def check_posts(self, posts: List[Post]) -> Dict[str, Any]:
         """
-        Check a post against a specific rule.
+        Check a batch of posts against all enabled alert rules.
+        
+        Authors, rules and topics are loaded once for the whole batch, missing
+        embeddings are generated with a single embed_batch call and all AlertLog
+        and AlertOutbox rows are written in one commit.
         
+        Args:
+            posts: Posts to check
+            
         Returns:
-            Dict with alert info if triggered, None otherwise
+            dict with stats: posts_checked, alerts_triggered, embeddings_generated,
+            alerts (list of triggered alert info dicts), errors
         """
-        # Enforce multi-tenancy: Rule owner must match Post's MonitoredAccount owner
-        # We assume post.author is loaded or lazy loads
-        if not post.author:
-             # Should not happen if foreign key valid, but safe check
-             return None
-             
-        if rule.user_id != post.author.user_id:
-            return None
-
-        # Check author allowlist
-        if rule.allowed_author_ids:
-            if post.author_id not in rule.allowed_author_ids:
-                return None
+        result = {
+            "posts_checked": 0,
+            "alerts_triggered": 0,
+            "embeddings_generated": 0,
+            "alerts": [],
+            "errors": [],
+        }
+        if not posts:
+            return result
         
-        # Check cooldown
-        if self._is_in_cooldown(rule, post):
-            return None
+        self._preload_authors(posts)
         
-        # Check keyword matching
-        keyword_match = self._check_keywords(post, rule)
-        if keyword_match:
-            return self._trigger_alert(post, rule, "keyword", None)
+        # Get all enabled rules, grouped by owner for the multi-tenancy check
+        rules = self.db.query(AlertRule).filter(AlertRule.enabled == True).all()
+        rules_by_user: Dict[int, List[AlertRule]] = {}
+        for rule in rules:
+            rules_by_user.setdefault(rule.user_id, []).append(rule)
         
-        # Check topic matching
-        topic_match = self._check_topics(post, rule)
-        if topic_match:
-            return self._trigger_alert(post, rule, "topic", topic_match["score"])
+        self._load_topics(rules)
+        self._load_open_groups(rules)
+        if self._last_alert_at is None:
+            self.load_cooldown_state()
+        # _trigger_alert advances cooldowns in memory; restored if the batch is rolled back
+        cooldown_snapshot = dict(self._last_alert_at)
         
-        return None
-
-    def _check_keywords(self, post: Post, rule: AlertRule) -> bool:
-        """Check if post matches any keywords in the rule."""
-        if not rule.keywords:
-            return False
+        result["embeddings_generated"] = self._embed_missing(posts, rules_by_user)
+        
+        if not self.trend_engine.warmed:
+            self.trend_engine.warm(self.db)
+        entity_keys = post_entity_keys(self.db, [post.id for post in posts])
+        
+        checked_at = datetime.utcnow()
+        posts_by_user: Dict[int, List[Post]] = {}
+        observed: List[Tuple[int, List[str], datetime]] = []
+        for post in posts:
+            result["posts_checked"] += 1
+            # Committed together with the alerts, so each post is evaluated exactly once
+            post.alerts_checked_at = checked_at
+            if not post.author:
+                # Should not happen if foreign key valid, but safe check
+                continue
+            # Trend counters see every post once, as it is marked checked
+            if entity_keys[post.id]:
+                observation = (post.author.user_id, entity_keys[post.id], post.created_at or checked_at)
+                self.trend_engine.observe(*observation, now=checked_at)
+                observed.append(observation)
+            # Enforce multi-tenancy: posts are only evaluated against their owner's rules
+            if post.author.user_id in rules_by_user:
+                posts_by_user.setdefault(post.author.user_id, []).append(post)
         
-        post_text_lower = post.text.lower()
+        try:
+            matches, result["errors"] = self._evaluate(posts_by_user, rules_by_user, entity_keys)
+            
+            posts_by_id = {post.id: post for post in posts}
+            rules_by_id = {rule.id: rule for rule in rules}
+            for match in matches:
+                alert = self._trigger_alert(
+                    posts_by_id[match["post_id"]],
+                    rules_by_id[match["rule_id"]],
+                    match["trigger_type"],
+                    match["score"],
+                )
+                result["alerts"].append(alert)
+            
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            # The posts stay unchecked and will be observed and alerted on again on
+            # retry; cooldowns set by the rolled-back alerts must not suppress that
+            self._last_alert_at = cooldown_snapshot
+            for user_id, keys, at in observed:
+                self.trend_engine.observe(user_id, keys, at, now=checked_at, count=-1)
+            logger.error("Failed to store alert logs", error=str(e), count=len(result["alerts"]))
+            raise
         
-        for keyword in rule.keywords:
-            # Simple case-insensitive substring match
-            # TODO: Add regex support later
-            if keyword.lower() in post_text_lower:
-                return True
+        result["alerts_triggered"] = len(result["alerts"])
+        return result
+
+    def _preload_authors(self, posts: List[Post]) -> None:
+        """Load the authors of all posts in one query so post.author resolves from the session."""
+        author_ids = {post.author_id for post in posts}
+        self.db.query(MonitoredAccount).filter(MonitoredAccount.id.in_(author_ids)).all()
+
+    def _load_topics(self, rules: List[AlertRule]) -> None:
+        """Load every topic referenced by the given rules in one query."""
+        topic_ids = {topic_id for rule in rules for topic_id in (rule.topic_ids or [])}
+        self._topics = {}
+        if topic_ids:
+            topics = self.db.query(Topic).filter(Topic.id.in_(topic_ids)).all()
+            self._topics = {topic.id: topic for topic in topics}
+
+    def _load_open_groups(self, rules: List[AlertRule]) -> None:
+        """
+        Load and lock the open outbox entries of coalescing rules.
         
-        return False
+        The row locks keep the dispatcher (which claims with SKIP LOCKED) from
+        sending an entry while this batch is still adding alerts to it.
+        """
+        keys = [self._coalesce_key(rule) for rule in rules if rule.coalesce_minutes > 0]
+        self._open_groups = {}
+        if keys:
+            groups = (
+                self.db.query(AlertOutbox)
+                .filter(
+                    AlertOutbox.coalesce_key.in_(keys),
+                    AlertOutbox.status == "pending",
+                    AlertOutbox.attempts == 0,
+                )
+                .with_for_update()
+                .all()
+            )
+            self._open_groups = {group.coalesce_key: group for group in groups}
+
+    @staticmethod
+    def _coalesce_key(rule: AlertRule) -> str:
+        return f"{rule.id}:{rule.channel}"
 
-    def _check_topics(self, post: Post, rule: AlertRule) -> Optional[Dict[str, float]]:
+    def _embed_missing(self, posts: List[Post], rules_by_user: Dict[int, List[AlertRule]]) -> int:
         """
-        Check if post matches any topics in the rule using cosine similarity.
+        Generate embeddings for posts that lack one and may be checked against a topic rule.
+        
+        Zero vectors (embed_batch's fallback when the API is unavailable) are not
+        stored, so the embedding stays NULL and is generated on a later attempt.
         
         Returns:
-            Dict with "score" if match found, None otherwise
+            Number of embeddings generated
         """
-        if not rule.topic_ids:
-            return None
+        missing = [
+            post for post in posts
+            if post.embedding is None
+            and post.author
+            and any(rule.topic_ids for rule in rules_by_user.get(post.author.user_id, []))
+        ]
+        if not missing:
+            return 0
         
-        # Get post embedding (generate if missing)
-        if not post.embedding:
-            embedding = self.embeddings_service.embed_text(post.text)
-            if embedding:
+        embeddings = self.embeddings_service.embed_batch([post.text for post in missing])
+        generated = 0
+        for post, embedding in zip(missing, embeddings):
+            if embedding and any(embedding):
                 post.embedding = embedding
-                self.db.commit()
+                generated += 1
         
-        if not post.embedding:
-            return None
+        return generated
+
+    def _evaluate(
+        self,
+        posts_by_user: Dict[int, List[Post]],
+        rules_by_user: Dict[int, List[AlertRule]],
+        entity_keys: Dict[int, List[str]],
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Score posts against rules, sharded by tenant.
         
-        # Get topics
-        topics = self.db.query(Topic).filter(Topic.id.in_(rule.topic_ids)).all()
+        Post and topic embeddings are stacked into normalized matrices once; each
+        tenant becomes a plain task that alert_eval runs in-process or across the
+        process pool. Trend rules are resolved here against the trend engine, so
+        tasks only carry the entities currently bursting for each rule.
         
-        best_score = 0.0
-        for topic in topics:
-            if not topic.embedding:
-                continue
-            
-            # Compute cosine similarity
-            similarity = self._cosine_similarity(post.embedding, topic.embedding)
-            
-            # Check if similarity exceeds both topic threshold and rule threshold
-            if similarity >= topic.threshold and similarity >= rule.similarity_threshold:
-                if similarity > best_score:
-                    best_score = similarity
+        Returns:
+            (matches, errors)
+        """
+        if not posts_by_user:
+            return [], []
+        
+        all_posts = [post for user_posts in posts_by_user.values() for post in user_posts]
+        row_of_post = {post.id: i for i, post in enumerate(all_posts)}
+        post_matrix = normalized_matrix([post.embedding for post in all_posts])
         
-        if best_score > 0:
-            return {"score": best_score}
+        topic_list = list(self._topics.values())
+        topic_matrix = normalized_matrix([topic.embedding for topic in topic_list])
+        topics = {topic.id: {"row": i, "threshold": topic.threshold} for i, topic in enumerate(topic_list)}
         
-        return None
+        now = datetime.utcnow()
+        tasks = []
+        for user_id, user_posts in posts_by_user.items():
+            user_rules = rules_by_user[user_id]
+            rule_ids = {rule.id for rule in user_rules}
+            user_keys = {key for post in user_posts for key in entity_keys[post.id]}
+            tasks.append({
+                "user_id": user_id,
+                "now": now,
+                "posts": [
+                    {
+                        "id": post.id,
+                        "author_id": post.author_id,
+                        "text": post.text,
+                        "row": row_of_post[post.id],
+                        "entities": entity_keys[post.id],
+                    }
+                    for post in user_posts
+                ],
+                "rules": [
+                    {
+                        "id": rule.id,
+                        "keywords": rule.keywords,
+                        "topic_ids": rule.topic_ids,
+                        "allowed_author_ids": rule.allowed_author_ids,
+                        "similarity_threshold": rule.similarity_threshold,
+                        "cooldown_minutes": rule.cooldown_minutes,
+                        "coalesce_minutes": rule.coalesce_minutes,
+                        "trending": self._trending(rule, user_keys, now),
+                    }
+                    for rule in user_rules
+                ],
+                "topics": {
+                    topic_id: topics[topic_id]
+                    for rule in user_rules for topic_id in (rule.topic_ids or []) if topic_id in topics
+                },
+                "last_alert_at": {key: value for key, value in self._last_alert_at.items() if key[0] in rule_ids},
+            })
+        
+        return evaluate_tasks(tasks, post_matrix, topic_matrix)
 
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
-        """Compute cosine similarity between two vectors."""
-        try:
-            v1 = np.array(vec1)
-            v2 = np.array(vec2)
-            
-            dot_product = np.dot(v1, v2)
-            norm1 = np.linalg.norm(v1)
-            norm2 = np.linalg.norm(v2)
-            
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
-            
-            return float(dot_product / (norm1 * norm2))
-        except Exception as e:
-            logger.error("Failed to compute cosine similarity", error=str(e))
-            return 0.0
+    def _trending(self, rule: AlertRule, keys: Set[str], now: datetime) -> Dict[str, float]:
+        """Entity keys in the batch that are bursting for a trend rule."""
+        if not rule.trend_window_minutes or not keys:
+            return {}
+        if rule.trend_terms:
+            keys = keys & {term_key(term) for term in rule.trend_terms}
+        return self.trend_engine.trending_keys(
+            rule.user_id,
+            keys,
+            rule.trend_window_minutes,
+            rule.trend_multiplier,
+            rule.trend_min_count,
+            now=now,
+        )
 
-    def _is_in_cooldown(self, rule: AlertRule, post: Post) -> bool:
-        """Check if rule is in cooldown period for this post's author."""
-        if rule.cooldown_minutes <= 0:
-            return False
+    def load_cooldown_state(self) -> None:
+        """
+        Load the latest alert time per (rule, author) for all rules that use a cooldown.
         
-        cutoff_time = datetime.utcnow() - timedelta(minutes=rule.cooldown_minutes)
+        Runs a single grouped query; afterwards cooldown checks are served from memory
+        (see alert_eval.evaluate_tenant) and kept current by _trigger_alert.
+        """
+        max_cooldown = (
+            self.db.query(func.max(AlertRule.cooldown_minutes))
+            .filter(AlertRule.enabled == True, AlertRule.cooldown_minutes > 0)
+            .scalar()
+        )
         
-        # Check if there's a recent alert for this rule and author
-        recent_alert = (
-            self.db.query(AlertLog)
-            .join(Post)
-            .filter(
-                AlertLog.rule_id == rule.id,
-                Post.author_id == post.author_id,
-                AlertLog.sent_at >= cutoff_time,
-            )
-            .first()
+        self._last_alert_at = {}
+        if not max_cooldown:
+            return
+        
+        cutoff_time = datetime.utcnow() - timedelta(minutes=max_cooldown)
+        rows = (
+            self.db.query(AlertLog.rule_id, Post.author_id, func.max(AlertLog.sent_at))
+            .join(Post, AlertLog.post_id == Post.id)
+            .filter(AlertLog.sent_at >= cutoff_time)
+            .group_by(AlertLog.rule_id, Post.author_id)
+            .all()
         )
         
-        return recent_alert is not None
+        for rule_id, author_id, last_sent_at in rows:
+            self._last_alert_at[(rule_id, author_id)] = last_sent_at
+        
+        logger.info("Loaded cooldown state", entries=len(self._last_alert_at))
 
     def _trigger_alert(
         self,
@@ -182,9 +324,21 @@ class AlertEngine:
         trigger_type: str,
         score: Optional[float],
     ) -> Dict[str, Any]:
-        """Trigger an alert and send notification."""
-        # Generate summary via LLM (will be implemented in step 9, stub for now)
-        summary = self._generate_summary(post)
+        """
+        Trigger an alert and queue its notification.
+        
+        The AlertLog and its AlertOutbox entry are committed together by check_posts;
+        delivery happens later in the NotificationDispatcher. Alerts of a coalescing
+        rule join the rule's open outbox entry, which is held back until its window ends.
+        """
+        # In two-phase mode the notification goes out with a local summary and
+        # the LLM summary is attached later by summarize_pending. Coalesced alerts
+        # get one summary for the whole group once the window closes.
+        if settings.alert_summary_mode == "two_phase" or rule.coalesce_minutes > 0:
+            summary = self.llm_service.quick_summary(post.text, max_sentences=2)
+            llm_summary = None
+        else:
+            summary = llm_summary = self._generate_summary(post)
         
         # Create alert log entry
         alert_log = AlertLog(
@@ -192,25 +346,38 @@ class AlertEngine:
             post_id=post.id,
             trigger_type=trigger_type,
             score=score,
-            status="sent",
+            status="pending",
+            summary=llm_summary,
         )
         self.db.add(alert_log)
         
-        # Send notification
+        if self._last_alert_at is not None:
+            self._last_alert_at[(rule.id, post.author_id)] = datetime.utcnow()
+        
+        # Queue notification
         trigger_info = {
             "trigger_type": trigger_type,
             "score": score,
         }
-        
-        try:
-            success = self.notifier.send_alert(rule, post, summary, trigger_info)
-            if not success:
-                alert_log.status = "failed"
-        except Exception as e:
-            logger.error("Failed to send alert", error=str(e), rule_id=rule.id, post_id=post.id)
-            alert_log.status = "failed"
-        
-        self.db.commit()
+        if rule.coalesce_minutes > 0:
+            key = self._coalesce_key(rule)
+            group = self._open_groups.get(key)
+            if group is None:
+                group = AlertOutbox(
+                    channel=rule.channel,
+                    coalesce_key=key,
+                    next_attempt_at=datetime.utcnow() + timedelta(minutes=rule.coalesce_minutes),
+                    payload={"summary": summary, "trigger_info": trigger_info},
+                )
+                self.db.add(group)
+                self._open_groups[key] = group
+            alert_log.outbox = group
+        else:
+            self.db.add(AlertOutbox(
+                alert_logs=[alert_log],
+                channel=rule.channel,
+                payload={"summary": summary, "trigger_info": trigger_info},
+            ))
         
         return {
             "rule_id": rule.id,
@@ -220,7 +387,73 @@ class AlertEngine:
             "summary": summary,
         }
 
+    def summarize_pending(self, limit: int = 100) -> int:
+        """
+        Attach LLM summaries to alerts that were delivered with a quick summary.
+        
+        A coalesced group is always summarized whole, with one LLM call, so a
+        group is never split across runs.
+        
+        Args:
+            limit: Maximum number of summaries (single alerts or whole groups) in this run
+            
+        Returns:
+            Number of alerts summarized
+        """
+        pending = (
+            AlertLog.summary.is_(None),
+            # Skip coalesced groups whose window is still open
+            or_(
+                AlertOutbox.coalesce_key.is_(None),
+                AlertOutbox.status != "pending",
+                AlertOutbox.attempts > 0,
+            ),
+        )
+        coalesced = AlertOutbox.coalesce_key.isnot(None)
+        group_id = case((coalesced, AlertLog.outbox_id), else_=None)
+        single_id = case((coalesced, None), else_=AlertLog.id)
+        units = (
+            self.db.query(group_id, single_id)
+            .select_from(AlertLog)
+            .outerjoin(AlertOutbox, AlertLog.outbox_id == AlertOutbox.id)
+            .filter(*pending)
+            .group_by(group_id, single_id)
+            .order_by(func.min(AlertLog.sent_at))
+            .limit(limit)
+            .all()
+        )
+        if not units:
+            return 0
+        group_ids = [unit[0] for unit in units if unit[0] is not None]
+        single_ids = [unit[1] for unit in units if unit[1] is not None]
+        
+        alert_logs = (
+            self.db.query(AlertLog)
+            .options(joinedload(AlertLog.post), joinedload(AlertLog.outbox))
+            .outerjoin(AlertOutbox, AlertLog.outbox_id == AlertOutbox.id)
+            .filter(*pending)
+            .filter(or_(AlertLog.outbox_id.in_(group_ids), AlertLog.id.in_(single_ids)))
+            .order_by(AlertLog.id)
+            .all()
+        )
+        
+        groups: Dict[int, List[AlertLog]] = {}
+        for alert_log in alert_logs:
+            if alert_log.outbox is not None and alert_log.outbox.coalesce_key:
+                groups.setdefault(alert_log.outbox_id, []).append(alert_log)
+            else:
+                alert_log.summary = self._generate_summary(alert_log.post)
+        
+        # One summary call per coalesced group
+        for group_logs in groups.values():
+            summary = self.summary_cache.get_group_summary([alert_log.post.text for alert_log in group_logs])
+            for alert_log in group_logs:
+                alert_log.summary = summary
+        
+        self.db.commit()
+        return len(alert_logs)
+
     def _generate_summary(self, post: Post) -> str:
-        """Generate a 1-2 sentence summary of the post."""
-        return self.llm_service.generate_summary(post.text, max_sentences=2)
+        """Generate a 1-2 sentence summary of the post, reusing cached summaries."""
+        return self.summary_cache.get_summary(post.text, max_sentences=2)
 
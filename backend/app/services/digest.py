@@ -1,15 +1,25 @@
 """Daily digest generation service."""
+import hashlib
+import json
 from datetime import datetime, timedelta, date
-from typing import Dict, List, Any, Optional
-from sqlalchemy.orm import Session
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, joinedload
 import structlog
 import numpy as np
-from app.models import MonitoredAccount, Post, Digest, Topic
+from app.config import settings
+from app.models import MonitoredAccount, Post, Digest, DigestState, Topic
 from app.services.llm import LLMService
+from app.services.summary_cache import SummaryCache
+from app.services.tokens import truncate_tokens
+from app.services.alert_eval import normalized_matrix
 from app.notifiers.base import Notifier
 
 logger = structlog.get_logger()
 
+POSTS_PER_ACCOUNT = 10
+
 
 class DigestService:
     """Service for generating daily digests."""
@@ -19,14 +29,23 @@ class DigestService:
         self.llm_service = llm_service
         self.notifier = notifier
 
-    def generate_digest(self, user_id: int, digest_date: Optional[date] = None, force: bool = False) -> Digest:
+    def generate_digest(
+        self,
+        user_id: int,
+        digest_date: Optional[date] = None,
+        force: bool = False,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> Digest:
         """
         Generate a daily digest for the specified user and date (defaults to today).
         
         Args:
             user_id: ID of the user to generate digest for
             digest_date: Date to generate digest for (defaults to today)
-            force: If True, regenerate digest even if it exists
+            force: If True, regenerate digest even if it exists, reusing the
+                latest one when its input fingerprint is unchanged
+            on_token: If given, an LLM-written digest is streamed to it as it
+                is generated; the digest is stored once complete
             
         Returns:
             Digest object
@@ -46,9 +65,20 @@ class DigestService:
         
         if force:
              logger.info("Forcing generation of NEW digest", digest_date=digest_date, user_id=user_id)
-             # We do NOT delete the old one, we create a new one.
+             # We do NOT delete the old one, we create a new one,
+             # unless the input is unchanged (see the input fingerprint below).
              pass
         
+        if settings.digest_mode == "incremental":
+            # Catch the rolling state up and assemble it; no LLM call at digest time
+            state = self.update_rolling_state(user_id, digest_date)
+            if state is not None and state.clusters:
+                content = self._assemble_rolling_digest(state)
+                fingerprint = hashlib.sha256(content.encode("utf-8")).hexdigest()
+                if existing and existing.input_fingerprint == fingerprint:
+                    return existing
+                return self._save_digest(user_id, digest_date, content, fingerprint, last_post_id=state.last_post_id)
+        
         # Get posts from last 24h for digest_enabled accounts OWNED BY THIS USER
         start_time = datetime.combine(digest_date, datetime.min.time()) - timedelta(days=1)
         end_time = datetime.combine(digest_date, datetime.max.time())
@@ -60,12 +90,16 @@ class DigestService:
         
         if not accounts:
             logger.info("No monitored accounts for user, skipping digest", user_id=user_id)
+            fingerprint = self._input_fingerprint([], [], 0, [])
+            if existing and existing.input_fingerprint == fingerprint:
+                return existing
             # Create an empty digest so we don't keep retrying? Or just return None?
             # Creating empty digest is better for UI.
             digest = Digest(
                 digest_date=digest_date,
                 content_markdown="No accounts monitored or digest enabled.",
                 user_id=user_id,
+                input_fingerprint=fingerprint,
             )
             self.db.add(digest)
             self.db.commit()
@@ -77,109 +111,56 @@ class DigestService:
         # Get user topics to filter by relevance
         topics = self.db.query(Topic).filter(Topic.user_id == user_id).all()
         
+        candidates_by_account = self._latest_posts_by_account(account_ids)
+        
+        # Score every candidate against every topic in one matmul
+        all_candidates = [post for account in accounts for post in candidates_by_account.get(account.id, [])]
+        passing, best_scores = self._score_topics(all_candidates, topics) if topics else (None, None)
+        row_of_post = {post.id: i for i, post in enumerate(all_candidates)}
+        
         posts = []
         stats_candidates = 0
         for account in accounts:
-            # Base query
-            query = self.db.query(Post).filter(
-                Post.author_id == account.id,
-            )
-            
-            # If user has topics, we only want posts that match ANY topic
-            # However, doing this efficiently in SQL with many topics is tricky.
-            # A common approach: If topics exist, fetch a bit more candidates (e.g. 20),
-            # then filter in Python for best control or use a complex OR on cosine distances.
-            # BUT, the user said "only select things related to topics IF set... of the 10 posts".
+            # The user said "only select things related to topics IF set... of the 10 posts".
             # This implies: 
             # 1. Take the latest 10 posts (quota).
             # 2. If topics exist, filter those 10.
             # 3. If no topics, keep all 10.
             
-            # Fetch latest 10 posts (quota includes reposts, assuming they are in DB)
-            candidates = query.order_by(Post.created_at.desc()).limit(10).all()
+            # Latest 10 posts (quota includes reposts, assuming they are in DB)
+            candidates = candidates_by_account.get(account.id, [])
             stats_candidates += len(candidates)
             
             if not topics:
                 # No topics set -> General "what's on" (keep all)
                 posts.extend(candidates)
-            else:
-                # Topics set -> Filter candidates by topic similarity
-                relevant_candidates = []
-                # Collect posts with their max similarity score
-                scored_candidates = []
-                
-                for post in candidates:
-                    if post.embedding is None:
-                         continue
-                         
-                    # Safe embedding parsing
-                    import json
-                    raw_emb = post.embedding
-                    if isinstance(raw_emb, str):
-                         try:
-                             raw_emb = json.loads(raw_emb)
-                         except:
-                             raw_emb = [float(x) for x in raw_emb.replace('[','').replace(']','').split(',')]
-
-                    post_vec = np.array(raw_emb)
-                    
-                    max_similarity = -1.0
-                    
-                    for topic in topics:
-                        if topic.embedding is None:
-                            continue
-                        
-                        raw_topic_emb = topic.embedding
-                        if isinstance(raw_topic_emb, str):
-                             try:
-                                 raw_topic_emb = json.loads(raw_topic_emb)
-                             except:
-                                 raw_topic_emb = [float(x) for x in raw_topic_emb.replace('[','').replace(']','').split(',')]
-
-                        topic_vec = np.array(raw_topic_emb)
-                        
-                        # Dimension check
-                        if post_vec.shape != topic_vec.shape:
-                            continue
-
-                        try:
-                            similarity = np.dot(post_vec, topic_vec)
-                            if similarity > max_similarity:
-                                max_similarity = float(similarity)
-                        except Exception:
-                            continue
-                    
-                    if max_similarity > -1.0:
-                        scored_candidates.append((post, max_similarity))
-                
-                # Logic:
-                # 1. Try strict threshold
-                # 2. If no results, try "soft" fallback (top 5 if score > 0.15)
-                # 3. If all scores are 0 (likely missing API key), fallback to ALL
-                
-                # Default threshold from the first topic (or 0.7)
-                threshold = topics[0].threshold if topics else 0.7
-                
-                relevant_candidates = [p for p, s in scored_candidates if s >= threshold]
-                
-                if not relevant_candidates:
-                    # Check for "top matches" that missed threshold but aren't zero
-                    # Filter for score > 0 (to avoid zero vectors)
-                    non_zero_matches = [(p, s) for p, s in scored_candidates if s > 0.001]
-                    
-                    if non_zero_matches:
-                        # We have some semantic signal, just weak. Take top 5.
-                        non_zero_matches.sort(key=lambda x: x[1], reverse=True)
-                        relevant_candidates = [p for p, s in non_zero_matches[:5]]
-                        logger.info("Used soft fallback for topics", count=len(relevant_candidates))
-                    else:
-                        # All scores are 0 or below. Likely embeddings are zero vectors (missing API key).
-                        # Fallback to ALL candidates to avoid empty digest.
-                        logger.warning("All similarity scores are 0. Falling back to all posts.", user_id=user_id)
-                        relevant_candidates = candidates
-                
+                continue
+            
+            rows = [row_of_post[post.id] for post in candidates]
+            
+            # Logic:
+            # 1. Keep posts that pass any topic's own threshold
+            # 2. If no results, try "soft" fallback (top 5 if score > 0.001)
+            # 3. If all scores are 0 (likely missing API key), fallback to ALL
+            relevant_candidates = [post for post, row in zip(candidates, rows) if passing[row]]
+            
+            if not relevant_candidates:
+                # Check for "top matches" that missed threshold but aren't zero
+                # Filter for score > 0 (to avoid zero vectors)
+                non_zero_matches = [(post, best_scores[row]) for post, row in zip(candidates, rows) if best_scores[row] > 0.001]
                 
-                posts.extend(relevant_candidates)
+                if non_zero_matches:
+                    # We have some semantic signal, just weak. Take top 5.
+                    non_zero_matches.sort(key=lambda x: x[1], reverse=True)
+                    relevant_candidates = [post for post, _ in non_zero_matches[:5]]
+                    logger.info("Used soft fallback for topics", count=len(relevant_candidates))
+                else:
+                    # All scores are 0 or below. Likely embeddings are zero vectors (missing API key).
+                    # Fallback to ALL candidates to avoid empty digest.
+                    logger.warning("All similarity scores are 0. Falling back to all posts.", user_id=user_id)
+                    relevant_candidates = candidates
+            
+            posts.extend(relevant_candidates)
         
         logger.info(
             "Generating digest",
@@ -189,33 +170,51 @@ class DigestService:
             posts_count=len(posts),
         )
         
-        # Group posts by author
-        posts_by_author: Dict[str, List[Dict[str, Any]]] = {}
-        for post in posts:
-            author = post.author.username
-            if author not in posts_by_author:
-                posts_by_author[author] = []
-            
-            posts_by_author[author].append({
-                "text": post.text,
-                "url": post.url,
-                "created_at": post.created_at.isoformat(),
-            })
+        # Identical input gives identical content: reuse it instead of calling the LLM
+        fingerprint = self._input_fingerprint(account_ids, posts, stats_candidates, topics)
+        cached = (
+            self.db.query(Digest)
+            .filter(Digest.user_id == user_id, Digest.input_fingerprint == fingerprint)
+            .order_by(Digest.created_at.desc())
+            .first()
+        )
+        if cached is not None and cached.digest_date == digest_date:
+            logger.info("Digest input unchanged, returning existing digest", digest_id=cached.id, user_id=user_id)
+            return cached
         
         # Generate digest content
-        if not posts:
+        if cached is not None:
+            content = cached.content_markdown
+        elif not posts:
              if stats_candidates > 0:
                  content = f"Analyzed {stats_candidates} recent posts from your accounts, but none matched your configured topics."
              else:
                  content = "No posts found for your monitored accounts today."
         else:
-             content = self.llm_service.generate_digest(posts_by_author)
+             posts_by_author = self._group_for_digest(posts)
+             content = self.llm_service.compose_digest(posts_by_author, on_token=on_token)
+             if content is None:
+                 # Fallback content is not reused, so the next run retries the LLM
+                 content = self.llm_service.basic_digest(posts_by_author)
+                 fingerprint = None
         
-        # Store digest
+        return self._save_digest(user_id, digest_date, content, fingerprint)
+
+    def _save_digest(
+        self,
+        user_id: int,
+        digest_date: date,
+        content: str,
+        fingerprint: Optional[str],
+        last_post_id: Optional[int] = None,
+    ) -> Digest:
+        """Store a digest and send it via the notifier."""
         digest = Digest(
             digest_date=digest_date,
             content_markdown=content,
             user_id=user_id,
+            input_fingerprint=fingerprint,
+            last_post_id=last_post_id,
         )
         self.db.add(digest)
         self.db.commit()
@@ -230,5 +229,382 @@ class DigestService:
         
         return digest
 
+    def update_rolling_state(self, user_id: int, digest_date: Optional[date] = None) -> Optional[DigestState]:
+        """
+        Fold posts stored since the last update into the user's rolling digest state.
+        
+        New posts are filtered by topic, attached to an existing cluster when
+        similar enough to its representative, and otherwise clustered among
+        themselves; only new clusters cost an (cached) LLM summary. Called every
+        ingestion cycle in incremental mode, so the LLM work is spread over the
+        day and the digest itself is a cheap assembly.
+        
+        Args:
+            user_id: ID of the user
+            digest_date: Day the state belongs to (defaults to today)
+            
+        Returns:
+            The updated state, or None if the user has no digest-enabled accounts
+        """
+        if digest_date is None:
+            digest_date = date.today()
+        
+        account_ids = [
+            row.id for row in self.db.query(MonitoredAccount.id).filter(
+                MonitoredAccount.digest_enabled == True,
+                MonitoredAccount.user_id == user_id,
+            )
+        ]
+        if not account_ids:
+            return None
+        
+        # A new day starts after the last post the previous delivered digest was
+        # assembled from; posts folded into that day's state after its digest went
+        # out would otherwise never reach any digest
+        previous_last_post_id = (
+            self.db.query(Digest.last_post_id)
+            .filter(
+                Digest.user_id == user_id,
+                Digest.digest_date < digest_date,
+                Digest.last_post_id.isnot(None),
+            )
+            .order_by(Digest.digest_date.desc(), Digest.created_at.desc())
+            .limit(1)
+            .scalar()
+        )
+        self.db.execute(
+            insert(DigestState)
+            .values(
+                user_id=user_id,
+                digest_date=digest_date,
+                last_post_id=previous_last_post_id or 0,
+                posts_seen=0,
+                clusters=[],
+                topic_posts={},
+                updated_at=datetime.utcnow(),
+            )
+            .on_conflict_do_nothing(constraint="uix_digest_state_user_date")
+        )
+        self.db.commit()
+        state = (
+            self.db.query(DigestState)
+            .filter(DigestState.user_id == user_id, DigestState.digest_date == digest_date)
+            .one()
+        )
+        
+        topics = self.db.query(Topic).filter(Topic.user_id == user_id).all()
+        start_time = datetime.combine(digest_date, datetime.min.time()) - timedelta(days=1)
+        batch_size = settings.digest_rolling_batch_size
+        while True:
+            query = (
+                self.db.query(Post)
+                .options(joinedload(Post.author))
+                .filter(
+                    Post.author_id.in_(account_ids),
+                    Post.id > state.last_post_id,
+                    Post.stored_at >= start_time,
+                )
+            )
+            if "collapse_digest" in settings.near_duplicate_policy:
+                query = query.filter(Post.duplicate_of_id.is_(None))
+            posts = query.order_by(Post.id).limit(batch_size).all()
+            if not posts:
+                break
+            
+            # Summaries (LLM calls) are made before the state row is locked, so a
+            # slow LLM never blocks generate_digest or another updater
+            base_post_id = state.last_post_id
+            clusters, topic_posts = self._fold_posts(state.clusters, state.topic_posts, posts, topics)
+            self.db.commit()
+            
+            state = (
+                self.db.query(DigestState)
+                .filter(DigestState.id == state.id)
+                .with_for_update()
+                .populate_existing()
+                .one()
+            )
+            if state.last_post_id != base_post_id:
+                # Another updater folded these posts meanwhile; continue from its state
+                self.db.commit()
+                continue
+            
+            state.clusters = clusters
+            state.topic_posts = topic_posts
+            state.last_post_id = posts[-1].id
+            state.posts_seen += len(posts)
+            self.db.commit()
+            if len(posts) < batch_size:
+                break
+        
+        return state
 
+    def _fold_posts(
+        self,
+        clusters: List[Dict[str, Any]],
+        topic_posts: Dict[str, List[List[Any]]],
+        posts: List[Post],
+        topics: List[Topic],
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, List[List[Any]]]]:
+        """
+        Add a batch of new posts to a state's clusters and per-topic top posts.
+        
+        Returns:
+            (new clusters, new topic_posts); the inputs are not modified
+        """
+        matrix = normalized_matrix([post.embedding for post in posts])
+        keep = np.ones(len(posts), dtype=bool)
+        
+        topics = [topic for topic in topics if topic.embedding is not None]
+        if topics:
+            sims = matrix @ normalized_matrix([topic.embedding for topic in topics]).T
+            passing = sims >= np.array([topic.threshold for topic in topics], dtype=np.float32)
+            # Posts that can't be scored are kept, like the full digest's all-zero fallback
+            keep = passing.any(axis=1) | ~matrix.any(axis=1)
+            
+            topic_posts = dict(topic_posts or {})
+            for col, topic in enumerate(topics):
+                entries = topic_posts.get(str(topic.id), []) + [
+                    [posts[row].id, float(sims[row, col])] for row in np.flatnonzero(passing[:, col])
+                ]
+                entries.sort(key=lambda entry: entry[1], reverse=True)
+                topic_posts[str(topic.id)] = entries[:settings.digest_top_posts_per_topic]
+        
+        clusters = [dict(cluster) for cluster in clusters or []]
+        kept = [posts[row] for row in np.flatnonzero(keep)]
+        if not kept:
+            return clusters, topic_posts
+        kept_matrix = matrix[keep]
+        
+        # Attach posts to existing clusters by similarity to their representative
+        unassigned = kept
+        if clusters and settings.digest_cluster_threshold < 1.0:
+            rep_ids = [cluster["rep"] for cluster in clusters]
+            rep_embeddings = dict(self.db.query(Post.id, Post.embedding).filter(Post.id.in_(rep_ids)).all())
+            sims = kept_matrix @ normalized_matrix([rep_embeddings.get(rep_id) for rep_id in rep_ids]).T
+            best = sims.argmax(axis=1)
+            unassigned = []
+            for row, post in enumerate(kept):
+                if sims[row, best[row]] < settings.digest_cluster_threshold:
+                    unassigned.append(post)
+                    continue
+                cluster = clusters[best[row]]
+                cluster["post_ids"] = cluster["post_ids"] + [post.id]
+                author = post.author.username
+                if author != cluster["author"] and author not in cluster["authors"]:
+                    cluster["authors"] = cluster["authors"] + [author]
+        
+        summary_cache = SummaryCache(self.db, self.llm_service)
+        for cluster in self._cluster_posts(unassigned):
+            rep = cluster[0]
+            clusters.append({
+                "rep": rep.id,
+                "author": rep.author.username,
+                "url": rep.url,
+                "summary": summary_cache.get_summary(rep.text, max_sentences=2),
+                "post_ids": [post.id for post in cluster],
+                "authors": sorted({post.author.username for post in cluster[1:]} - {rep.author.username}),
+            })
+        
+        if len(clusters) > settings.digest_rolling_max_clusters:
+            clusters.sort(key=lambda cluster: len(cluster["post_ids"]), reverse=True)
+            clusters = clusters[:settings.digest_rolling_max_clusters]
+        return clusters, topic_posts
+
+    def _assemble_rolling_digest(self, state: DigestState) -> str:
+        """Render the rolling state as markdown: the largest clusters, then top posts per topic."""
+        parts = ["# Daily Digest\n", "\n## Top stories\n"]
+        
+        clusters = sorted(state.clusters, key=lambda cluster: len(cluster["post_ids"]), reverse=True)
+        for cluster in clusters[:settings.digest_top_clusters]:
+            line = f"- **{cluster['author']}**: {cluster['summary']}"
+            similar_count = len(cluster["post_ids"]) - 1
+            if similar_count:
+                source = f" from {', '.join(cluster['authors'])}" if cluster["authors"] else ""
+                line += f" (+{similar_count} similar post{'s' if similar_count > 1 else ''}{source})"
+            if cluster.get("url"):
+                line += f" [link]({cluster['url']})"
+            parts.append(line)
+        
+        topic_posts = {int(topic_id): entries for topic_id, entries in (state.topic_posts or {}).items() if entries}
+        if topic_posts:
+            topics = self.db.query(Topic).filter(Topic.id.in_(topic_posts.keys())).order_by(Topic.name).all()
+            post_ids = {post_id for entries in topic_posts.values() for post_id, _ in entries}
+            posts = {
+                post.id: post
+                for post in self.db.query(Post).options(joinedload(Post.author)).filter(Post.id.in_(post_ids))
+            }
+            for topic in topics:
+                parts.append(f"\n## {topic.name}\n")
+                for post_id, _ in topic_posts[topic.id]:
+                    post = posts.get(post_id)
+                    if post is None:
+                        continue
+                    text = truncate_tokens(" ".join(post.text.split()), settings.digest_post_max_tokens)
+                    line = f"- **{post.author.username}**: {text}"
+                    if post.url:
+                        line += f" [link]({post.url})"
+                    parts.append(line)
+        
+        return "\n".join(parts)
+
+    def _group_for_digest(self, posts: List[Post]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Group posts by author for the LLM.
+        
+        Posts about the same thing share one entry: the cluster representative,
+        under its author, carries the count and authors of the rest.
+        """
+        posts_by_author: Dict[str, List[Dict[str, Any]]] = {}
+        for cluster in self._cluster_posts(posts):
+            post = cluster[0]
+            author = post.author.username
+            if author not in posts_by_author:
+                posts_by_author[author] = []
+            
+            posts_by_author[author].append({
+                "text": post.text,
+                "url": post.url,
+                "created_at": post.created_at.isoformat(),
+                "similar_count": len(cluster) - 1,
+                "similar_authors": sorted({p.author.username for p in cluster[1:]} - {author}),
+            })
+        return posts_by_author
+
+    def _input_fingerprint(
+        self,
+        account_ids: List[int],
+        posts: List[Post],
+        stats_candidates: int,
+        topics: List[Topic],
+    ) -> str:
+        """
+        Hash everything that determines a digest's content.
+        
+        Covers the accounts, selected posts, candidate count, topic versions,
+        the model and whether the LLM is available, and the settings that shape
+        the prompt.
+        """
+        payload = {
+            "accounts": sorted(account_ids),
+            "posts": sorted(post.id for post in posts),
+            "candidates": stats_candidates,
+            "topics": sorted(
+                [topic.id, topic.threshold, topic.updated_at.isoformat() if topic.updated_at else None]
+                for topic in topics
+            ),
+            "model": self.llm_service.model,
+            "llm": self.llm_service.client is not None,
+            "settings": [
+                settings.digest_cluster_threshold,
+                settings.digest_post_max_tokens,
+                settings.digest_prompt_max_tokens,
+            ],
+        }
+        return hashlib.sha256(json.dumps(payload, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _score_topics(posts: List[Post], topics: List[Topic]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cosine-score posts against topics.
+        
+        Posts and topics are stacked into row-normalized float32 matrices and
+        compared with a single matmul; each topic's own threshold applies.
+        Posts or topics without an embedding score 0.
+        
+        Args:
+            posts: Candidate posts
+            topics: User topics
+            
+        Returns:
+            (bool array: post passes at least one topic threshold,
+             float array: best cosine similarity per post)
+        """
+        topics = [topic for topic in topics if topic.embedding is not None]
+        if not posts or not topics:
+            return np.zeros(len(posts), dtype=bool), np.zeros(len(posts), dtype=np.float32)
+        
+        post_matrix = normalized_matrix([post.embedding for post in posts])
+        topic_matrix = normalized_matrix([topic.embedding for topic in topics])
+        thresholds = np.array([topic.threshold for topic in topics], dtype=np.float32)
+        
+        sims = post_matrix @ topic_matrix.T
+        return (sims >= thresholds).any(axis=1), sims.max(axis=1)
 
+    @staticmethod
+    def _cluster_posts(posts: List[Post]) -> List[List[Post]]:
+        """
+        Greedy threshold clustering on embedding cosine similarity.
+        
+        Posts with the most neighbours above digest_cluster_threshold seed
+        clusters first, so each cluster's first post (its representative) is
+        the most central one. Posts without an embedding stay on their own.
+        
+        Args:
+            posts: Digest posts
+            
+        Returns:
+            Clusters, representative first, in order of first appearance in posts
+        """
+        threshold = settings.digest_cluster_threshold
+        if len(posts) < 2 or threshold >= 1.0:
+            return [[post] for post in posts]
+        
+        matrix = normalized_matrix([post.embedding for post in posts])
+        has_embedding = matrix.any(axis=1)
+        similar = (matrix @ matrix.T) >= threshold
+        similar &= has_embedding[:, None] & has_embedding[None, :]
+        np.fill_diagonal(similar, True)
+        
+        assigned = np.zeros(len(posts), dtype=bool)
+        clusters = []
+        # Stable sort keeps the original order among equally connected seeds
+        for seed in np.argsort(-similar.sum(axis=1), kind="stable"):
+            if assigned[seed]:
+                continue
+            members = np.flatnonzero(similar[seed] & ~assigned)
+            assigned[members] = True
+            others = [int(i) for i in members if i != seed]
+            clusters.append([int(seed)] + others)
+        
+        clusters.sort(key=min)
+        return [[posts[i] for i in cluster] for cluster in clusters]
+
+    def _latest_posts_by_account(self, account_ids: List[int]) -> Dict[int, List[Post]]:
+        """
+        Fetch the latest POSTS_PER_ACCOUNT posts of every account in one query.
+        
+        Posts are ranked per author with ROW_NUMBER() (served by the
+        (author_id, created_at) index) and authors are loaded in the same query.
+        
+        Args:
+            account_ids: Accounts to fetch posts for
+            
+        Returns:
+            dict of account_id -> posts, newest first
+        """
+        ranked = self.db.query(
+            Post.id.label("post_id"),
+            func.row_number().over(
+                partition_by=Post.author_id,
+                order_by=Post.created_at.desc(),
+            ).label("rn"),
+        ).filter(Post.author_id.in_(account_ids))
+        if "collapse_digest" in settings.near_duplicate_policy:
+            # Near-duplicates are represented by their original
+            ranked = ranked.filter(Post.duplicate_of_id.is_(None))
+        ranked = ranked.subquery()
+        
+        posts = (
+            self.db.query(Post)
+            .options(joinedload(Post.author))
+            .join(ranked, ranked.c.post_id == Post.id)
+            .filter(ranked.c.rn <= POSTS_PER_ACCOUNT)
+            .order_by(Post.author_id, ranked.c.rn)
+            .all()
+        )
+        
+        posts_by_account: Dict[int, List[Post]] = {}
+        for post in posts:
+            posts_by_account.setdefault(post.author_id, []).append(post)
+        return posts_by_account
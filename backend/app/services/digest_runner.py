@@ -0,0 +1,275 @@
+"""Multi-tenant digest fan-out."""
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy.orm import Session
+import structlog
+from app.config import settings
+from app.models import Digest, MonitoredAccount, Setting, User
+from app.notifiers.base import Notifier
+from app.services.digest import DigestService
+from app.services.llm import LLMService
+
+logger = structlog.get_logger()
+
+# Per-user Setting keys
+DIGEST_TIME_KEY = "digest_time"
+TIMEZONE_KEY = "timezone"
+
+
+def parse_digest_time(value: str) -> time:
+    """Parse an HH:MM digest time, raising ValueError if invalid."""
+    parts = str(value).split(":")
+    hour = int(parts[0])
+    minute = int(parts[1]) if len(parts) > 1 else 0
+    return time(hour, minute)
+
+
+def parse_timezone(value: str) -> ZoneInfo:
+    """Resolve an IANA timezone name, raising ValueError if unknown."""
+    try:
+        return ZoneInfo(str(value))
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ValueError(f"Unknown timezone: {value}") from e
+
+
+def jitter(user_id: int) -> timedelta:
+    """Stable per-user offset in [0, digest_jitter_minutes), so a user's slot doesn't move between days."""
+    window = settings.digest_jitter_minutes * 60
+    if window <= 0:
+        return timedelta(0)
+    digest = hashlib.blake2b(str(user_id).encode("utf-8"), digest_size=8).digest()
+    return timedelta(seconds=int.from_bytes(digest, "big") % window)
+
+
+class DigestRunner:
+    """
+    Generates digests for many tenants concurrently.
+
+    Digest generation is dominated by LLM latency, so tenants run on a bounded
+    thread pool (at most max_workers digests at once). Each tenant gets its own
+    session and a failure only affects that tenant.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        notifier: Notifier,
+        llm_service: Optional[LLMService] = None,
+        max_workers: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.notifier = notifier
+        self.llm_service = llm_service or LLMService()
+        self.max_workers = max_workers or settings.digest_max_workers
+
+    def active_user_ids(self) -> List[int]:
+        """Active users with at least one digest-enabled account."""
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(User.id)
+                .filter(
+                    User.is_active == True,
+                    User.monitored_accounts.any(MonitoredAccount.digest_enabled == True),
+                )
+                .order_by(User.id)
+                .all()
+            )
+            return [row.id for row in rows]
+        finally:
+            db.close()
+
+    def due_digests(self, now: Optional[datetime] = None) -> Dict[int, date]:
+        """
+        Find users whose digest slot for their local today has passed without a digest.
+
+        A user's slot is their "digest_time" setting in their "timezone" setting
+        (falling back to settings.digest_time and settings.timezone) plus a stable
+        jitter, so load spreads across the day instead of peaking at one instant.
+        Slots missed while the worker was down are picked up later that local day.
+
+        Args:
+            now: Current time (default: now, UTC)
+
+        Returns:
+            dict of user_id -> local digest date
+        """
+        now = now or datetime.now(timezone.utc)
+        user_ids = self.active_user_ids()
+        if not user_ids:
+            return {}
+
+        db = self.session_factory()
+        try:
+            schedules = self._schedules(db, user_ids)
+            due: Dict[int, date] = {}
+            for user_id in user_ids:
+                digest_time, tz = schedules[user_id]
+                local_now = now.astimezone(tz)
+                start = datetime.combine(local_now.date(), digest_time, tzinfo=tz)
+                # Keep the jittered slot on the same local day
+                end_of_day = datetime.combine(local_now.date(), time(23, 59), tzinfo=tz)
+                slot = min(start + jitter(user_id), max(start, end_of_day))
+                if local_now >= slot:
+                    due[user_id] = local_now.date()
+
+            if due:
+                done = (
+                    db.query(Digest.user_id, Digest.digest_date)
+                    .filter(Digest.user_id.in_(due.keys()), Digest.digest_date.in_(set(due.values())))
+                    .distinct()
+                    .all()
+                )
+                for user_id, digest_date in done:
+                    if due.get(user_id) == digest_date:
+                        del due[user_id]
+            return due
+        finally:
+            db.close()
+
+    def local_dates(self, user_ids: List[int], now: Optional[datetime] = None) -> Dict[int, date]:
+        """Each user's current date in their digest timezone."""
+        now = now or datetime.now(timezone.utc)
+        db = self.session_factory()
+        try:
+            schedules = self._schedules(db, user_ids)
+        finally:
+            db.close()
+        return {user_id: now.astimezone(tz).date() for user_id, (_, tz) in schedules.items()}
+
+    def _schedules(self, db: Session, user_ids: List[int]) -> Dict[int, Tuple[time, ZoneInfo]]:
+        """Resolve each user's digest time and timezone from their settings in one query."""
+        default_time = parse_digest_time(settings.digest_time)
+        default_tz = parse_timezone(settings.timezone)
+        schedules = {user_id: (default_time, default_tz) for user_id in user_ids}
+
+        rows = (
+            db.query(Setting.user_id, Setting.key, Setting.value)
+            .filter(Setting.user_id.in_(user_ids), Setting.key.in_([DIGEST_TIME_KEY, TIMEZONE_KEY]))
+            .all()
+        )
+        for user_id, key, value in rows:
+            digest_time, tz = schedules[user_id]
+            try:
+                if key == DIGEST_TIME_KEY:
+                    digest_time = parse_digest_time(value)
+                else:
+                    tz = parse_timezone(value)
+            except ValueError as e:
+                logger.warning("Invalid digest schedule setting, using default", user_id=user_id, key=key, error=str(e))
+                continue
+            schedules[user_id] = (digest_time, tz)
+        return schedules
+
+    def run(
+        self,
+        user_ids: Iterable[int],
+        digest_date: Optional[date] = None,
+        digest_dates: Optional[Dict[int, date]] = None,
+    ) -> dict:
+        """
+        Generate digests for the given users.
+
+        Args:
+            user_ids: Users to generate digests for
+            digest_date: Date to generate digests for (defaults to today)
+            digest_dates: Per-user dates, overriding digest_date
+
+        Returns:
+            dict with stats: users, generated, failed, errors
+        """
+        user_ids = list(user_ids)
+        digest_dates = digest_dates or {}
+        stats = {"users": len(user_ids), "generated": 0, "failed": 0, "errors": []}
+        if not user_ids:
+            return stats
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="digest") as executor:
+            futures = {
+                executor.submit(self.generate_for_user, user_id, digest_dates.get(user_id, digest_date)): user_id
+                for user_id in user_ids
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                user_id = futures[future]
+                try:
+                    future.result()
+                    stats["generated"] += 1
+                except Exception as e:
+                    logger.error("Digest generation failed", user_id=user_id, error=str(e))
+                    stats["failed"] += 1
+                    stats["errors"].append({"user_id": user_id, "error": str(e)})
+
+                if done % settings.digest_progress_every == 0:
+                    logger.info(
+                        "Digest progress",
+                        done=done,
+                        total=len(user_ids),
+                        generated=stats["generated"],
+                        failed=stats["failed"],
+                    )
+
+        return stats
+
+    def update_rolling_states(self) -> dict:
+        """
+        Fold newly ingested posts into every active user's rolling digest state.
+
+        Runs on the same bounded pool as digest generation, one session per tenant.
+
+        Returns:
+            dict with stats: users, updated, failed, errors
+        """
+        user_ids = self.active_user_ids()
+        local_dates = self.local_dates(user_ids)
+        stats = {"users": len(user_ids), "updated": 0, "failed": 0, "errors": []}
+        if not user_ids:
+            return stats
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="digest") as executor:
+            futures = {
+                executor.submit(self.update_state_for_user, user_id, local_dates[user_id]): user_id
+                for user_id in user_ids
+            }
+            for future in as_completed(futures):
+                user_id = futures[future]
+                try:
+                    future.result()
+                    stats["updated"] += 1
+                except Exception as e:
+                    logger.error("Rolling digest update failed", user_id=user_id, error=str(e))
+                    stats["failed"] += 1
+                    stats["errors"].append({"user_id": user_id, "error": str(e)})
+
+        return stats
+
+    def update_state_for_user(self, user_id: int, digest_date: date) -> None:
+        """Update one tenant's rolling digest state in its own session."""
+        db = self.session_factory()
+        try:
+            DigestService(db, self.llm_service, self.notifier).update_rolling_state(user_id, digest_date)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def generate_for_user(self, user_id: int, digest_date: Optional[date] = None) -> int:
+        """
+        Generate one tenant's digest in its own session.
+
+        Returns:
+            Digest ID
+        """
+        db = self.session_factory()
+        try:
+            service = DigestService(db, self.llm_service, self.notifier)
+            digest = service.generate_digest(user_id, digest_date=digest_date)
+            return digest.id
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
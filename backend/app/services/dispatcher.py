@@ -0,0 +1,259 @@
+"""Outbox dispatcher for alert notifications."""
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+import structlog
+from app.config import settings
+from app.models import AlertLog, AlertOutbox
+from app.notifiers.base import Notifier
+from app.services.llm import LLMService
+from app.services.summary_cache import SummaryCache
+
+logger = structlog.get_logger()
+
+
+class NotificationDispatcher:
+    """
+    Drains the alert outbox and delivers notifications concurrently.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED so several dispatchers
+    can run side by side, and each delivery runs in its own session on a shared
+    thread pool. A per-channel semaphore caps concurrent deliveries to one channel.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        notifiers: Dict[str, Notifier],
+        default_notifier: Notifier,
+        max_workers: Optional[int] = None,
+        channel_concurrency: Optional[Dict[str, int]] = None,
+        max_attempts: Optional[int] = None,
+        backoff_seconds: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.notifiers = notifiers
+        self.default_notifier = default_notifier
+        self.max_workers = max_workers or settings.dispatch_max_workers
+        self.channel_concurrency = channel_concurrency or settings.dispatch_channel_concurrency
+        self.max_attempts = max_attempts or settings.dispatch_max_attempts
+        self.backoff_seconds = backoff_seconds or settings.dispatch_backoff_seconds
+        self.lease_seconds = settings.dispatch_lease_seconds
+        self.llm_service = LLMService()
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dispatch")
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._semaphores_lock = threading.Lock()
+
+    def dispatch_pending(self, batch_size: int = 100) -> dict:
+        """
+        Claim due outbox entries and deliver them.
+
+        Args:
+            batch_size: Maximum number of entries to claim in this run
+
+        Returns:
+            dict with stats: claimed, sent, retried, failed
+        """
+        claims = self._claim(batch_size)
+        stats = {"claimed": len(claims), "sent": 0, "retried": 0, "failed": 0}
+        if not claims:
+            return stats
+
+        futures = [self._executor.submit(self._deliver, outbox_id, claim_token) for outbox_id, claim_token in claims]
+        wait(futures)
+
+        for future in futures:
+            try:
+                outcome = future.result()
+            except Exception as e:
+                logger.error("Outbox delivery crashed", error=str(e))
+                continue
+            if outcome in stats:
+                stats[outcome] += 1
+
+        logger.info("Dispatched outbox batch", **stats)
+        return stats
+
+    def shutdown(self) -> None:
+        """Wait for in-flight deliveries and stop the worker pool."""
+        self._executor.shutdown(wait=True)
+
+    def _claim(self, batch_size: int) -> List[Tuple[int, str]]:
+        """
+        Mark due entries (and entries whose lease expired) as processing.
+
+        Returns:
+            (outbox id, claim token) for each claimed entry
+        """
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            lease_cutoff = now - timedelta(seconds=self.lease_seconds)
+            entries = (
+                db.query(AlertOutbox)
+                .filter(
+                    or_(
+                        (AlertOutbox.status == "pending") & (AlertOutbox.next_attempt_at <= now),
+                        (AlertOutbox.status == "processing") & (AlertOutbox.claimed_at < lease_cutoff),
+                    )
+                )
+                .order_by(AlertOutbox.next_attempt_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            claims = []
+            for entry in entries:
+                entry.status = "processing"
+                entry.claimed_at = now
+                entry.claim_token = str(uuid.uuid4())
+                claims.append((entry.id, entry.claim_token))
+            db.commit()
+            return claims
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _deliver(self, outbox_id: int, claim_token: str) -> str:
+        """
+        Deliver a single outbox entry.
+
+        The outcome is only recorded while this claim still holds the entry: if
+        the lease expired and another dispatcher reclaimed it, that claim owns
+        the entry and this one leaves it alone.
+
+        Returns:
+            Outcome: "sent", "retried", "failed" or "skipped"
+        """
+        db = self.session_factory()
+        try:
+            entry = db.query(AlertOutbox).filter(AlertOutbox.id == outbox_id).first()
+            # Idempotency: another dispatcher may already have delivered or reclaimed it
+            if not entry or entry.status != "processing" or entry.claim_token != claim_token:
+                return "skipped"
+
+            alert_logs: List[AlertLog] = entry.alert_logs
+            if not alert_logs:
+                if not self._finish(db, entry.id, claim_token, status="failed", last_error="No alerts attached"):
+                    return "skipped"
+                db.commit()
+                return "failed"
+
+            notifier = self.notifiers.get(entry.channel, self.default_notifier)
+            trigger_info = dict(entry.payload.get("trigger_info") or {})
+            trigger_info["delivery_id"] = entry.id
+
+            if entry.coalesce_key:
+                summary = self._group_summary(db, alert_logs)
+                trigger_info["count"] = len(alert_logs)
+                trigger_info["matches"] = [
+                    {"post_id": alert_log.post_id, "trigger_type": alert_log.trigger_type, "score": alert_log.score}
+                    for alert_log in alert_logs
+                ]
+            else:
+                summary = entry.payload.get("summary", "")
+
+            error = None
+            with self._semaphore(entry.channel):
+                try:
+                    rule = alert_logs[0].rule
+                    if entry.coalesce_key:
+                        posts = [alert_log.post for alert_log in alert_logs]
+                        success = notifier.send_alert_group(rule, posts, summary, trigger_info)
+                    else:
+                        success = notifier.send_alert(rule, alert_logs[0].post, summary, trigger_info)
+                    if not success:
+                        error = "Notifier reported failure"
+                except Exception as e:
+                    error = str(e)
+
+            attempts = entry.attempts + 1
+            if error is None:
+                outcome = "sent"
+                values = {"status": "sent", "delivered_at": datetime.utcnow(), "last_error": None}
+            elif attempts >= self.max_attempts:
+                outcome = "failed"
+                values = {"status": "failed", "last_error": error}
+            else:
+                outcome = "retried"
+                values = {"status": "pending", "last_error": error, "next_attempt_at": datetime.utcnow() + self._backoff(attempts)}
+
+            if not self._finish(db, entry.id, claim_token, attempts=attempts, **values):
+                logger.warning("Outbox lease lost before delivery was recorded", outbox_id=entry.id, outcome=outcome)
+                return "skipped"
+
+            if outcome in ("sent", "failed"):
+                for alert_log in alert_logs:
+                    alert_log.status = outcome
+            if outcome == "failed":
+                logger.error("Alert delivery failed permanently", outbox_id=entry.id, channel=entry.channel, error=error)
+            elif outcome == "retried":
+                logger.warning("Alert delivery failed, will retry", outbox_id=entry.id, attempts=attempts, error=error)
+
+            db.commit()
+            return outcome
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _finish(db: Session, outbox_id: int, claim_token: str, **values) -> bool:
+        """
+        Record an outcome if the claim still holds the entry.
+
+        The update is conditional on the claim token, so it is atomic against a
+        concurrent reclaim. On False the transaction is rolled back and nothing
+        (including AlertLog changes) is written.
+        """
+        updated = (
+            db.query(AlertOutbox)
+            .filter(
+                AlertOutbox.id == outbox_id,
+                AlertOutbox.status == "processing",
+                AlertOutbox.claim_token == claim_token,
+            )
+            .update({**values, "claim_token": None}, synchronize_session=False)
+        )
+        if updated != 1:
+            db.rollback()
+            return False
+        return True
+
+    def _group_summary(self, db: Session, alert_logs: List[AlertLog]) -> str:
+        """
+        One summary for a coalesced group.
+
+        Inline mode makes a single LLM call and stores it on every alert; in
+        two-phase mode the notification lists quick summaries and the alert
+        engine's summary job attaches the LLM summary later.
+        """
+        texts = [alert_log.post.text for alert_log in alert_logs]
+        if settings.alert_summary_mode == "inline":
+            summary = SummaryCache(db, self.llm_service).get_group_summary(texts)
+            for alert_log in alert_logs:
+                alert_log.summary = summary
+            return summary
+        return "\n".join(f"- {LLMService.quick_summary(text, max_sentences=1)}" for text in texts)
+
+    def _semaphore(self, channel: str) -> threading.BoundedSemaphore:
+        """Get the concurrency limiter for a channel."""
+        with self._semaphores_lock:
+            if channel not in self._semaphores:
+                limit = self.channel_concurrency.get(channel, self.channel_concurrency.get("default", 4))
+                self._semaphores[channel] = threading.BoundedSemaphore(limit)
+            return self._semaphores[channel]
+
+    def _backoff(self, attempts: int) -> timedelta:
+        """Exponential backoff with jitter."""
+        delay = self.backoff_seconds * (2 ** (attempts - 1))
+        return timedelta(seconds=delay * random.uniform(0.8, 1.2))
@@ -0,0 +1,66 @@
+"""Cashtag, hashtag and mention extraction."""
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+Entity = Tuple[str, str]  # (kind, normalized value)
+
+CASHTAG = "cashtag"
+HASHTAG = "hashtag"
+MENTION = "mention"
+
+_CASHTAG = re.compile(r"(?<![\w$])\$([A-Za-z][A-Za-z0-9]{0,9})\b")
+_HASHTAG = re.compile(r"(?<![\w#])#(\w{1,100})")
+_MENTION = re.compile(r"(?<![\w@])@(\w{1,15})")
+_BARE_TICKER = re.compile(r"\b[A-Z][A-Z0-9]{1,9}\b")
+
+# X API v2 entity lists and the field holding their value
+_RAW_ENTITY_FIELDS = {
+    "cashtags": (CASHTAG, "tag"),
+    "hashtags": (HASHTAG, "tag"),
+    "mentions": (MENTION, "username"),
+}
+
+
+def normalize(kind: str, value: str) -> str:
+    """Cashtags are upper case; hashtags and mentions are lower case."""
+    value = value.lstrip("$#@")
+    return value.upper() if kind == CASHTAG else value.lower()
+
+
+def extract_entities(text: str, raw_json: Optional[Dict[str, Any]] = None) -> Set[Entity]:
+    """
+    Extract entities from post text and, when present, the X API entities payload.
+
+    Args:
+        text: Post text
+        raw_json: Raw tweet object from the X API
+
+    Returns:
+        Set of (kind, value) pairs
+    """
+    entities: Set[Entity] = set()
+    for kind, pattern in ((CASHTAG, _CASHTAG), (HASHTAG, _HASHTAG), (MENTION, _MENTION)):
+        for match in pattern.findall(text or ""):
+            entities.add((kind, normalize(kind, match)))
+
+    raw_entities = (raw_json or {}).get("entities") or {}
+    for field, (kind, key) in _RAW_ENTITY_FIELDS.items():
+        for item in raw_entities.get(field) or []:
+            value = item.get(key) if isinstance(item, dict) else None
+            if value:
+                entities.add((kind, normalize(kind, value)))
+
+    return entities
+
+
+def query_entities(question: str) -> Tuple[Set[Entity], List[str]]:
+    """
+    Find entities named in a search question.
+
+    Returns:
+        (explicit entities such as $BTC, #ai or @user,
+         bare upper-case words such as BTC that may be tickers)
+    """
+    explicit = extract_entities(question)
+    bare = [word for word in _BARE_TICKER.findall(question) if (CASHTAG, word) not in explicit]
+    return explicit, bare
@@ -0,0 +1,67 @@
+"""SimHash fingerprints for near-duplicate post detection."""
+import hashlib
+import re
+from typing import List, Optional
+
+BITS = 64
+BANDS = 4  # Pigeonhole: fingerprints within BANDS - 1 bits share at least one exact band
+BAND_BITS = BITS // BANDS
+MIN_WORDS = 3  # Shorter texts (e.g. URL- or emoji-only) get no fingerprint; they would all collide
+
+_URL = re.compile(r"https?://\S+")
+_TOKEN = re.compile(r"[\w$#@']+")
+
+
+def _words(text: str) -> List[str]:
+    """Lowercased words, ignoring URLs (t.co links differ on every copy)."""
+    return _TOKEN.findall(_URL.sub(" ", text.lower()))
+
+
+def _tokens(words: List[str]) -> List[str]:
+    """Word 3-shingles."""
+    return [" ".join(words[i:i + 3]) for i in range(len(words) - 2)]
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    Compute an unsigned 64-bit SimHash of text.
+
+    Returns None for texts with fewer than MIN_WORDS words: with no tokens every
+    such text would hash to 0 and match every other one.
+    """
+    words = _words(text or "")
+    if len(words) < MIN_WORDS:
+        return None
+
+    weights = [0] * BITS
+    for token in _tokens(words):
+        h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit in range(BITS):
+        if weights[bit] > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def bands(fingerprint: int) -> List[int]:
+    """Split a fingerprint into position-tagged bands, suitable for an indexed array overlap lookup."""
+    mask = (1 << BAND_BITS) - 1
+    return [(i << BAND_BITS) | (fingerprint >> (i * BAND_BITS) & mask) for i in range(BANDS)]
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return bin((a ^ b) & ((1 << BITS) - 1)).count("1")
+
+
+def to_signed(fingerprint: int) -> int:
+    """Map an unsigned 64-bit fingerprint onto Postgres BIGINT."""
+    return fingerprint - (1 << BITS) if fingerprint >= 1 << (BITS - 1) else fingerprint
+
+
+def from_signed(value: int) -> int:
+    """Inverse of to_signed."""
+    return value + (1 << BITS) if value < 0 else value
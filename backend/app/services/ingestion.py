@@ -1,11 +1,15 @@
 """Ingestion service for fetching and storing posts from X API."""
+from datetime import datetime, timedelta
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 import structlog
-from app.models import MonitoredAccount, Post
+from app.models import MonitoredAccount, Post, PostEntity
 from app.services.x_client import XClient
 from app.schemas import XPost
+from app.config import settings
+from app.services import fingerprint
+from app.services.entities import extract_entities
 
 logger = structlog.get_logger()
 
@@ -22,7 +26,7 @@ class IngestionService:
 
     # ... (ingest_all_accounts and ingest_account remain same)
 
-    def _store_posts(self, posts: List[XPost], account_id: int) -> int:
+    def _store_posts(self, posts: List[XPost], account_id: int, user_id: int) -> int:
         """Store posts in database with deduplication."""
         stored_count = 0
         
@@ -47,9 +51,16 @@ class IngestionService:
             if existing:
                 continue  # Skip duplicate
             
+            # Near-duplicates reuse the original's embedding when the policy allows
+            post_fingerprint = fingerprint.simhash(post.text)
+            original = self._find_near_duplicate(post_fingerprint, user_id) if post_fingerprint is not None else None
+            policy = settings.near_duplicate_policy
+            
             # Generate embedding
             embedding = None
-            if self.embeddings_service:
+            if original is not None and "reuse_embedding" in policy and original.embedding is not None:
+                embedding = original.embedding
+            elif self.embeddings_service:
                 try:
                     embedding = self.embeddings_service.embed_text(post.text)
                 except Exception as e:
@@ -59,12 +70,23 @@ class IngestionService:
             db_post = Post(
                 x_post_id=post.id,
                 author_id=account_id,
+                user_id=user_id,
                 created_at=post.created_at,
                 text=post.text,
                 url=post.url,
                 raw_json=post.raw_json,
                 embedding=embedding,
+                simhash=fingerprint.to_signed(post_fingerprint) if post_fingerprint is not None else None,
+                simhash_bands=fingerprint.bands(post_fingerprint) if post_fingerprint is not None else None,
+                duplicate_of_id=original.id if original is not None else None,
+                entities=[
+                    PostEntity(kind=kind, value=value)
+                    for kind, value in extract_entities(post.text, post.raw_json)
+                ],
             )
+            if original is not None and "skip_alerts" in policy:
+                # Mark as already evaluated so the alert engine never picks it up
+                db_post.alerts_checked_at = datetime.utcnow()
             
             try:
                 self.db.add(db_post)
@@ -81,6 +103,37 @@ class IngestionService:
 
         return stored_count
 
+    def _find_near_duplicate(self, post_fingerprint: int, user_id: int) -> Optional[Post]:
+        """
+        Find a recent post of the same user whose SimHash is within near_duplicate_max_distance bits.
+        
+        Candidates share at least one exact band (GIN-indexed array overlap);
+        the Hamming distance is then checked in Python. Returns the root original.
+        Other users' posts are never candidates, so one tenant's copy of a text
+        cannot suppress another tenant's alerts or digest entries.
+        """
+        cutoff = datetime.utcnow() - timedelta(days=settings.near_duplicate_window_days)
+        candidates = (
+            self.db.query(Post.id, Post.simhash, Post.duplicate_of_id)
+            .filter(
+                Post.simhash_bands.overlap(fingerprint.bands(post_fingerprint)),
+                Post.user_id == user_id,
+                Post.stored_at >= cutoff,
+            )
+            .limit(100)
+            .all()
+        )
+        
+        best = None
+        for candidate in candidates:
+            distance = fingerprint.hamming(post_fingerprint, fingerprint.from_signed(candidate.simhash))
+            if distance <= settings.near_duplicate_max_distance and (best is None or distance < best[0]):
+                best = (distance, candidate.duplicate_of_id or candidate.id)
+        
+        if best is None:
+            return None
+        return self.db.query(Post).filter(Post.id == best[1]).first()
+
     def ingest_all_accounts(self) -> dict:
         """
         Ingest new posts for all monitored accounts.
@@ -169,7 +222,7 @@ class IngestionService:
         )
 
         # Store new posts and dedupe
-        stored_count = self._store_posts(posts, account_id)
+        stored_count = self._store_posts(posts, account_id, account.user_id)
         
         # Update last_seen_post_id if we got new posts
         if posts:
@@ -1,11 +1,17 @@
 """LLM service for generating summaries and answers."""
-from typing import Optional, List, Dict, Any
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, List, Dict, Any
 from openai import OpenAI
 from app.config import settings
+from app.services.tokens import count_tokens, truncate_tokens
 import structlog
 
 logger = structlog.get_logger()
 
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_MAP_ROUNDS = 3  # Map-reduce rounds before the remaining input is truncated
+
 
 class LLMService:
     """Service for LLM operations using OpenAI."""
@@ -27,13 +33,23 @@ class LLMService:
             max_sentences: Maximum number of sentences in summary
             
         Returns:
-            Summary string
+            Summary string (truncated text if the LLM is unavailable)
+        """
+        summary = self.summarize(text, max_sentences=max_sentences)
+        if summary is None:
+            return self.truncate(text)
+        return summary
+
+    def summarize(self, text: str, max_sentences: int = 2) -> Optional[str]:
+        """
+        Generate a summary with the LLM.
+        
+        Returns:
+            Summary string, or None if the API key is missing or the call failed
         """
         if not self.client:
             logger.warning("OpenAI API key not configured, returning truncated text")
-            if len(text) > 200:
-                return text[:200] + "..."
-            return text
+            return None
         
         try:
             prompt = f"""Summarize the following text in {max_sentences} sentences. Be concise and factual:
@@ -56,10 +72,20 @@ Summary:"""
             return summary
         except Exception as e:
             logger.error("Failed to generate summary", error=str(e))
-            # Fallback to truncated text
-            if len(text) > 200:
-                return text[:200] + "..."
-            return text
+            return None
+
+    @staticmethod
+    def quick_summary(text: str, max_sentences: int = 2, limit: int = 200) -> str:
+        """Local extractive summary: the first max_sentences sentences, capped at limit characters."""
+        sentences = _SENTENCE_END.split(" ".join(text.split()))
+        return LLMService.truncate(" ".join(sentences[:max_sentences]), limit=limit)
+
+    @staticmethod
+    def truncate(text: str, limit: int = 200) -> str:
+        """Fallback summary: the text cut to limit characters."""
+        if len(text) > limit:
+            return text[:limit] + "..."
+        return text
 
     def generate_digest(
         self,
@@ -68,62 +94,244 @@ Summary:"""
         """
         Generate a daily digest from posts grouped by author.
         
+        Small inputs go to the LLM in one prompt. Inputs over
+        digest_prompt_max_tokens are summarized map-reduce: sections (authors)
+        are packed into prompt-sized chunks and summarized in parallel, then
+        the section summaries are merged into the final digest.
+        
+        Args:
+            posts_by_author: Dict mapping author username to list of post dicts
+            
+        Returns:
+            Markdown formatted digest (a basic digest if the LLM is unavailable)
+        """
+        digest = self.compose_digest(posts_by_author)
+        if digest is None:
+            return self.basic_digest(posts_by_author)
+        return digest
+
+    def compose_digest(
+        self,
+        posts_by_author: Dict[str, List[Dict[str, Any]]],
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> Optional[str]:
+        """
+        Generate a digest with the LLM.
+        
         Args:
             posts_by_author: Dict mapping author username to list of post dicts
+            on_token: If given, the final completion is streamed and each text
+                delta is passed to it as it arrives
             
         Returns:
-            Markdown formatted digest
+            Markdown digest, or None if the API key is missing or the call failed
         """
         if not self.client:
             logger.warning("OpenAI API key not configured, generating basic digest")
-            return self._basic_digest(posts_by_author)
+            return None
         
         try:
-            # Build context
-            context_parts = []
-            for author, posts in posts_by_author.items():
-                context_parts.append(f"\n## {author}\n")
-                for post in posts:
-                    context_parts.append(f"- {post['text'][:200]}")
+            sections = [self._digest_section(author, posts) for author, posts in posts_by_author.items()]
+            total_tokens = sum(count_tokens(section) for section in sections)
             
-            context = "\n".join(context_parts)
+            if total_tokens > settings.digest_prompt_max_tokens:
+                logger.info("Summarizing digest map-reduce", sections=len(sections), input_tokens=total_tokens)
+                sections = self._map_sections(sections)
             
-            prompt = f"""Create a daily digest from the following posts grouped by author. 
-Summarize the key themes and insights. Group related posts together. 
-Be concise but informative. Format as markdown with sections.
+            return self._complete_digest("\n".join(sections), on_token=on_token)
+        except Exception as e:
+            logger.error("Failed to generate digest", error=str(e))
+            return None
+
+    @staticmethod
+    def _digest_section(heading: str, posts: List[Dict[str, Any]]) -> str:
+        """Render one author's (or cluster's) posts, each capped at digest_post_max_tokens."""
+        lines = [f"\n## {heading}\n"]
+        for post in posts:
+            lines.append(f"- {LLMService._digest_post_line(post)}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _digest_post_line(post: Dict[str, Any]) -> str:
+        """A post's text capped at digest_post_max_tokens, noting similar posts it stands for."""
+        text = truncate_tokens(" ".join(post['text'].split()), settings.digest_post_max_tokens)
+        similar_count = post.get('similar_count', 0)
+        if similar_count:
+            others = post.get('similar_authors') or []
+            source = f" from {', '.join(others)}" if others else ""
+            text += f" (+{similar_count} similar post{'s' if similar_count > 1 else ''}{source})"
+        return text
+
+    def _map_sections(self, sections: List[str]) -> List[str]:
+        """
+        Reduce sections until they fit one prompt.
+        
+        Sections are packed into chunks of at most digest_prompt_max_tokens and
+        each chunk is summarized by a parallel LLM call; rounds repeat (up to
+        _MAP_ROUNDS) while the summaries are still too large. A chunk whose
+        call fails is passed on as its raw sections. The result is always cut
+        to fit the budget (see _fit_budget).
+        """
+        budget = settings.digest_prompt_max_tokens
+        raw = [True] * len(sections)
+        for _ in range(_MAP_ROUNDS):
+            if len(sections) <= 1 or sum(count_tokens(section) for section in sections) <= budget:
+                break
+            chunks: List[List[str]] = []
+            chunks_raw: List[bool] = []
+            chunk_tokens = 0
+            for section, section_raw in zip(sections, raw):
+                section = truncate_tokens(section, budget)
+                tokens = count_tokens(section)
+                if not chunks or chunk_tokens + tokens > budget:
+                    chunks.append([])
+                    chunks_raw.append(True)
+                    chunk_tokens = 0
+                chunks[-1].append(section)
+                chunks_raw[-1] = chunks_raw[-1] and section_raw
+                chunk_tokens += tokens
+            
+            with ThreadPoolExecutor(max_workers=settings.digest_map_workers, thread_name_prefix="digest-map") as executor:
+                summaries = list(executor.map(self._summarize_chunk, chunks))
+            sections, raw = [], []
+            for chunk, chunk_raw, summary in zip(chunks, chunks_raw, summaries):
+                if summary is None:
+                    sections.append("\n".join(chunk))
+                    raw.append(chunk_raw)
+                else:
+                    sections.append(summary)
+                    raw.append(False)
+        
+        return self._fit_budget(sections, raw, budget)
+
+    @staticmethod
+    def _fit_budget(sections: List[str], raw: List[bool], budget: int) -> List[str]:
+        """
+        Cut sections so that together they fit in budget tokens.
+        
+        Summarized sections get the budget first, then raw (unsummarized)
+        ones, truncated or dropped once it runs out; order is preserved.
+        """
+        kept: Dict[int, str] = {}
+        remaining = budget
+        for i in sorted(range(len(sections)), key=lambda i: raw[i]):
+            section = sections[i]
+            tokens = count_tokens(section)
+            if tokens > remaining:
+                # Leave room for the "..." truncate_tokens appends
+                if remaining <= 1:
+                    continue
+                section = truncate_tokens(section, remaining - 1)
+                tokens = count_tokens(section)
+            kept[i] = section
+            remaining -= tokens
+        
+        if len(kept) < len(sections):
+            logger.warning("Dropped digest sections over the prompt budget", dropped=len(sections) - len(kept))
+        return [kept[i] for i in sorted(kept)]
+
+    def _summarize_chunk(self, sections: List[str]) -> Optional[str]:
+        """Map step: condense a chunk of sections, keeping their headings. None if the call fails."""
+        context = "\n".join(sections)
+        prompt = f"""Condense the following posts into a short markdown summary.
+Keep each "## " heading, with the key points and notable details under it as bullets.
 
 Posts:
 {context}
 
-Digest:"""
-            
+Summary:"""
+        
+        try:
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": "You are a helpful assistant that creates informative digests from social media posts."},
+                    {"role": "system", "content": "You are a helpful assistant that condenses social media posts for a digest."},
                     {"role": "user", "content": prompt},
                 ],
-                max_tokens=2000,
-                temperature=0.5,
+                max_tokens=settings.digest_section_max_tokens,
+                temperature=0.3,
             )
-            
-            digest = response.choices[0].message.content.strip()
-            return digest
+            return response.choices[0].message.content.strip()
         except Exception as e:
-            logger.error("Failed to generate digest", error=str(e))
-            return self._basic_digest(posts_by_author)
+            logger.error("Failed to summarize digest section", error=str(e))
+            return None
+
+    def _complete_digest(self, context: str, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Final (reduce) step: write the digest from posts or section summaries."""
+        prompt = f"""Create a daily digest from the following posts grouped by author. 
+Summarize the key themes and insights. Group related posts together. 
+Posts marked "+N similar posts" stand for several near-identical posts; treat them as widely shared.
+Be concise but informative. Format as markdown with sections.
+
+Posts:
+{context}
+
+Digest:"""
+        
+        return self.complete(
+            [
+                {"role": "system", "content": "You are a helpful assistant that creates informative digests from social media posts."},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=settings.digest_max_tokens,
+            temperature=0.5,
+            on_token=on_token,
+        )
+
+    def complete(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        Run a chat completion, optionally streaming it.
+        
+        Args:
+            messages: Chat messages
+            max_tokens: Completion token limit
+            temperature: Sampling temperature
+            on_token: If given, the completion is streamed and each text delta
+                is passed to it as it arrives
+            
+        Returns:
+            The full completion text
+        """
+        if on_token is None:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+            return response.choices[0].message.content.strip()
+        
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+        )
+        parts = []
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                on_token(delta)
+        return "".join(parts).strip()
 
-    def _basic_digest(self, posts_by_author: Dict[str, List[Dict[str, Any]]]) -> str:
+    def basic_digest(self, posts_by_author: Dict[str, List[Dict[str, Any]]]) -> str:
         """Generate a basic digest without LLM."""
         parts = ["# Daily Digest\n"]
         
         for author, posts in posts_by_author.items():
             parts.append(f"\n## {author}\n")
             for post in posts:
-                text = post['text']
-                if len(text) > 200:
-                    text = text[:200] + "..."
-                parts.append(f"- {text}\n")
+                parts.append(f"- {self._digest_post_line(post)}\n")
         
         return "\n".join(parts)
 
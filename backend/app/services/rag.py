@@ -1,14 +1,19 @@
 """RAG service for search and chat."""
-from typing import List, Dict, Any, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 import structlog
-from app.models import Post
+from app.config import settings
+from app.models import ChatMessage, Post
 from app.services.embeddings import EmbeddingsService
+from app.services.entities import CASHTAG, query_entities
 from app.services.llm import LLMService
 
 logger = structlog.get_logger()
 
+SEARCH_MODES = ("hybrid", "vector", "lexical")
+
 
 class RAGService:
     """Service for RAG (Retrieval-Augmented Generation) operations."""
@@ -18,72 +23,343 @@ class RAGService:
         self.embeddings_service = embeddings_service
         self.llm_service = llm_service
 
-    def search(self, query: str, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+    def search(
+        self,
+        query: str,
+        user_id: int,
+        limit: int = 10,
+        use_entities: bool = True,
+        mode: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
         """
-        Search posts using vector similarity for a specific user.
+        Search posts for a specific user.
+        
+        In hybrid mode, full-text and vector retrieval each rank up to
+        hybrid_search_candidates posts and the lists are merged with reciprocal
+        rank fusion, so exact tickers, handles and names are found even when
+        they sit far apart in embedding space. The query embedding is fetched
+        while the full-text query runs. If no embedding can be generated, the
+        full-text results are returned on their own.
+        
+        When the query names cashtags, hashtags or mentions (or bare tickers
+        such as BTC that the user's posts use as cashtags), candidates are
+        pre-filtered through the post_entities index before ranking. If that
+        finds nothing, the unfiltered search is used.
         
         Args:
             query: Search query text
             user_id: User ID to filter posts by
             limit: Maximum number of results
+            use_entities: Pre-filter on entities named in the query
+            mode: hybrid, vector or lexical (default settings.search_mode)
             
         Returns:
-            List of post dicts with similarity scores
+            List of post dicts with similarity (None for full-text-only
+            matches) and fused score
         """
-        # Generate query embedding
-        query_embedding = self.embeddings_service.embed_text(query)
+        mode = mode or settings.search_mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            embedding = executor.submit(self._embed_query, query) if mode != "lexical" else None
+            
+            entity_filter = self._entity_filter(query, user_id) if use_entities else {}
+            if entity_filter:
+                posts = self._retrieve(query, embedding, user_id, limit, mode, entity_filter)
+                if posts:
+                    return posts
+                logger.info("No posts matched query entities, searching unfiltered", user_id=user_id, entities=entity_filter)
+            
+            return self._retrieve(query, embedding, user_id, limit, mode)
+
+    def _embed_query(self, query: str) -> Optional[str]:
+        """Query embedding as a pgvector literal '[0.1,0.2,...]', or None if unavailable."""
+        try:
+            query_embedding = self.embeddings_service.embed_text(query)
+        except Exception as e:
+            logger.warning("Failed to generate query embedding", error=str(e))
+            return None
         if not query_embedding:
             logger.warning("Failed to generate query embedding")
-            return []
+            return None
+        return "[" + ",".join(str(v) for v in query_embedding) + "]"
+
+    def _retrieve(
+        self,
+        query: str,
+        embedding: Optional["Future[Optional[str]]"],
+        user_id: int,
+        limit: int,
+        mode: str,
+        entity_filter: Optional[Dict[str, List[str]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Run the retrievers for a search mode and merge their rankings."""
+        candidates = max(limit, settings.hybrid_search_candidates)
+        lexical = self._lexical_search(query, user_id, candidates, entity_filter) if mode != "vector" else []
+        
+        vector_str = embedding.result() if embedding is not None else None
+        if vector_str is None:
+            if mode != "lexical":
+                logger.info("Query embedding unavailable, using full-text search only", user_id=user_id)
+                if mode == "vector":
+                    lexical = self._lexical_search(query, user_id, limit, entity_filter)
+            return self._fuse([lexical], limit)
+        
+        vector = self._vector_search(vector_str, user_id, limit if mode == "vector" else candidates, entity_filter)
+        if mode == "vector":
+            return vector
+        return self._fuse([lexical, vector], limit)
+
+    @staticmethod
+    def _fuse(rankings: List[List[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+        """
+        Merge ranked lists with reciprocal rank fusion.
+        
+        Each post scores sum(1 / (k + rank)) over the lists it appears in,
+        with k = hybrid_search_rrf_k. Only ranks are used, so full-text and
+        cosine scores never need to be put on one scale.
+        """
+        k = settings.hybrid_search_rrf_k
+        fused: Dict[int, Dict[str, Any]] = {}
+        for ranking in rankings:
+            for rank, post in enumerate(ranking, start=1):
+                entry = fused.setdefault(post["id"], {**post, "score": 0.0})
+                for field in ("similarity", "matches_all_terms"):
+                    if entry.get(field) is None and post.get(field) is not None:
+                        entry[field] = post[field]
+                entry["score"] += 1.0 / (k + rank)
+        
+        return sorted(fused.values(), key=lambda post: post["score"], reverse=True)[:limit]
+
+    def _entity_filter(self, query: str, user_id: int) -> Dict[str, List[str]]:
+        """
+        Entities named in the query, grouped by kind.
+        
+        Bare upper-case words only count as tickers if the user's posts
+        already contain them as cashtags, so words like "AI" or "CEO" in a
+        question don't narrow the search unless they really are tickers.
+        """
+        explicit, bare = query_entities(query)
+        entity_filter: Dict[str, List[str]] = {}
+        for kind, value in sorted(explicit):
+            entity_filter.setdefault(kind, []).append(value)
+        
+        if bare:
+            known = self.db.execute(
+                text("""
+                    SELECT DISTINCT e.value
+                    FROM post_entities e
+                    JOIN posts p ON p.id = e.post_id
+                    WHERE e.kind = :kind AND e.value = ANY(:values) AND p.user_id = :user_id
+                """),
+                {"kind": CASHTAG, "values": bare, "user_id": user_id},
+            ).scalars().all()
+            if known:
+                entity_filter.setdefault(CASHTAG, []).extend(sorted(known))
+        
+        return entity_filter
+
+    def _vector_search(
+        self,
+        vector_str: str,
+        user_id: int,
+        limit: int,
+        entity_filter: Optional[Dict[str, List[str]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank the user's posts by cosine similarity, optionally restricted to posts with given entities.
+        
+        The tenant and entity filters are applied while the HNSW index is
+        scanned. With iterative scans the index keeps producing candidates
+        until limit rows pass them (or vector_search_max_scan_tuples is hit),
+        so small tenants still get complete results. relaxed_order can return
+        rows slightly out of order, so they are re-sorted after the scan.
+        """
+        params: Dict[str, Any] = {
+            "query_embedding": vector_str,
+            "user_id": user_id,
+            "limit": limit,
+        }
+        entity_clause = self._entity_clause(entity_filter, params)
         
         # Vector search using pgvector cosine distance
         # Using <=> operator for cosine distance (1 - cosine similarity)
-        # Format vector as string for pgvector: '[0.1,0.2,...]'
-        vector_str = "[" + ",".join(str(v) for v in query_embedding) + "]"
-        
         # Use CAST() syntax which is safer with SQLAlchemy text() than :: operator
-        sql = text("""
+        sql = text(f"""
+            WITH nearest AS MATERIALIZED (
+                SELECT 
+                    p.id, p.x_post_id, p.author_id, p.created_at, p.text, p.url,
+                    p.embedding <=> CAST(:query_embedding AS vector) as distance
+                FROM posts p
+                WHERE p.embedding IS NOT NULL AND p.user_id = :user_id{entity_clause}
+                ORDER BY distance
+                LIMIT :limit
+            )
+            SELECT id, x_post_id, author_id, created_at, text, url, 1 - distance as similarity
+            FROM nearest
+            ORDER BY distance
+        """)
+        
+        self._tune_search(limit)
+        return [self._post_dict(row) for row in self.db.execute(sql, params)]
+
+    def _lexical_search(
+        self,
+        query: str,
+        user_id: int,
+        limit: int,
+        entity_filter: Optional[Dict[str, List[str]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank the user's posts by full-text match against the query.
+        
+        The query's lexemes are OR-ed so questions match posts containing any
+        of them; ts_rank_cd favours posts matching more of them, closer
+        together. Each result also says whether it contains every lexeme
+        (matches_all_terms), which chat uses to tell real keyword hits from
+        posts that merely share a common word. Served by the GIN index on
+        posts.search_vector.
+        """
+        params: Dict[str, Any] = {"query": query, "user_id": user_id, "limit": limit}
+        entity_clause = self._entity_clause(entity_filter, params)
+        
+        sql = text(f"""
+            WITH q AS (
+                -- Quoted lexemes are taken literally, so '-5' stays a term rather than NOT 5
+                SELECT
+                    CAST(string_agg(quote_literal(lexeme), ' | ') AS tsquery) AS query,
+                    CAST(string_agg(quote_literal(lexeme), ' & ') AS tsquery) AS all_terms
+                FROM unnest(tsvector_to_array(to_tsvector('english', :query))) AS lexeme
+            )
             SELECT 
                 p.id, p.x_post_id, p.author_id, p.created_at, p.text, p.url,
-                1 - (p.embedding <=> CAST(:query_embedding AS vector)) as similarity
-            FROM posts p
-            JOIN monitored_accounts m ON p.author_id = m.id
-            WHERE p.embedding IS NOT NULL AND m.user_id = :user_id
-            ORDER BY p.embedding <=> CAST(:query_embedding AS vector)
+                ts_rank_cd(p.search_vector, q.query) as rank,
+                p.search_vector @@ q.all_terms as matches_all_terms
+            FROM posts p, q
+            WHERE p.search_vector @@ q.query AND p.user_id = :user_id{entity_clause}
+            ORDER BY rank DESC
             LIMIT :limit
         """)
         
-        result = self.db.execute(
-            sql,
+        return [self._post_dict(row) for row in self.db.execute(sql, params)]
+
+    @staticmethod
+    def _entity_clause(entity_filter: Optional[Dict[str, List[str]]], params: Dict[str, Any]) -> str:
+        """SQL restricting posts p to those with any of the given entities; adds its parameters to params."""
+        if not entity_filter:
+            return ""
+        conditions = []
+        for i, (kind, values) in enumerate(sorted(entity_filter.items())):
+            conditions.append(f"(e.kind = :kind_{i} AND e.value = ANY(:values_{i}))")
+            params[f"kind_{i}"] = kind
+            params[f"values_{i}"] = values
+        return f"""
+              AND p.id IN (
+                  SELECT e.post_id FROM post_entities e
+                  WHERE {" OR ".join(conditions)}
+              )"""
+
+    @staticmethod
+    def _post_dict(row: Any) -> Dict[str, Any]:
+        similarity = getattr(row, "similarity", None)
+        post = {
+            "id": row.id,
+            "x_post_id": row.x_post_id,
+            "author_id": row.author_id,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "text": row.text,
+            "url": row.url,
+            "similarity": float(similarity) if similarity is not None else None,
+        }
+        matches_all_terms = getattr(row, "matches_all_terms", None)
+        if matches_all_terms is not None:
+            post["matches_all_terms"] = bool(matches_all_terms)
+        return post
+
+    def _tune_search(self, limit: int) -> None:
+        """
+        Apply HNSW search settings for the current transaction.
+        
+        ef_search bounds how many rows a single index pass can return, so it
+        is never set below the requested limit.
+        """
+        self.db.execute(
+            text("""
+                SELECT set_config('hnsw.ef_search', :ef_search, true),
+                       set_config('hnsw.iterative_scan', :iterative_scan, true),
+                       set_config('hnsw.max_scan_tuples', :max_scan_tuples, true)
+            """),
             {
-                "query_embedding": vector_str,
-                "user_id": user_id,
-                "limit": limit,
-            }
+                "ef_search": str(max(settings.vector_search_ef_search, limit)),
+                "iterative_scan": settings.vector_search_iterative_scan,
+                "max_scan_tuples": str(settings.vector_search_max_scan_tuples),
+            },
         )
+
+    def measure_recall(self, user_id: int, samples: int = 20, limit: int = 10) -> Dict[str, Any]:
+        """
+        Compare index-backed search with exact search for a user.
+        
+        Embeddings of randomly sampled posts are used as queries. Each is run
+        once through the HNSW index and once with index scans disabled, which
+        forces an exact scan.
+        
+        Args:
+            user_id: User whose posts are searched
+            samples: Number of query posts
+            limit: Results per query
+            
+        Returns:
+            Dict with queries, limit, ef_search, and mean and minimum recall
+        """
+        queries = self.db.execute(
+            text("""
+                SELECT CAST(p.embedding AS text)
+                FROM posts p
+                WHERE p.embedding IS NOT NULL AND p.user_id = :user_id
+                ORDER BY random()
+                LIMIT :samples
+            """),
+            {"user_id": user_id, "samples": samples},
+        ).scalars().all()
         
-        posts = []
-        for row in result:
-            posts.append({
-                "id": row.id,
-                "x_post_id": row.x_post_id,
-                "author_id": row.author_id,
-                "created_at": row.created_at.isoformat() if row.created_at else None,
-                "text": row.text,
-                "url": row.url,
-                "similarity": float(row.similarity) if row.similarity else 0.0,
-            })
+        # Settings are transaction-local; roll back so each pass starts clean
+        self.db.rollback()
+        approximate = [{post["id"] for post in self._vector_search(q, user_id, limit)} for q in queries]
+        self.db.rollback()
+        self.db.execute(text("SELECT set_config('enable_indexscan', 'off', true)"))
+        exact = [{post["id"] for post in self._vector_search(q, user_id, limit)} for q in queries]
+        self.db.rollback()
         
-        return posts
+        recalls = [len(a & e) / len(e) for a, e in zip(approximate, exact) if e]
+        stats = {
+            "queries": len(recalls),
+            "limit": limit,
+            "ef_search": max(settings.vector_search_ef_search, limit),
+            "recall": sum(recalls) / len(recalls) if recalls else None,
+            "min_recall": min(recalls) if recalls else None,
+        }
+        logger.info("Measured vector search recall", user_id=user_id, **stats)
+        return stats
 
-    def chat(self, question: str, user_id: int, limit: int = 10) -> Dict[str, Any]:
+    def chat(
+        self,
+        question: str,
+        user_id: int,
+        limit: int = 10,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
         """
         Answer a question using RAG with citations.
         
+        The exchange is stored in the user's chat history once the answer is complete.
+        
         Args:
             question: User question
             user_id: User ID to filter posts by
             limit: Maximum number of posts to retrieve
+            on_token: If given, the answer is streamed to it as it is generated
             
         Returns:
             Dict with answer, citations, and retrieved posts
@@ -94,7 +370,13 @@ class RAGService:
         # Filter posts by relevance threshold to correctly handle "normal LLM" mode
         # If query is "hi", dot product with trading posts will be low.
         RELEVANCE_THRESHOLD = 0.35
-        posts = [p for p in raw_posts if p.get('similarity', 0) > RELEVANCE_THRESHOLD]
+        # Posts with a similarity must pass the threshold; full-text-only matches
+        # (no similarity) must contain every query term, so a shared common word
+        # like "people" doesn't pull unrelated posts into the context
+        posts = [
+            p for p in raw_posts
+            if (p['similarity'] > RELEVANCE_THRESHOLD if p.get('similarity') is not None else p.get('matches_all_terms', False))
+        ]
         
         # If no relevant posts found, we proceed with empty context
         # This effectively makes it a "normal LLM" for irrelevant queries
@@ -152,9 +434,8 @@ If the user asks a general question (e.g., "What are people saying about AI?", "
             if not self.llm_service.client:
                 answer_text = "LLM service is not configured. Please configure OpenAI API key."
             else:
-                answer = self.llm_service.client.chat.completions.create(
-                    model=self.llm_service.model,
-                    messages=[
+                answer_text = self.llm_service.complete(
+                    [
                         {
                             "role": "system",
                             "content": "You are a senior financial analyst. You strictly follow the requested Markdown format. You do not hallucinate signals.",
@@ -163,13 +444,19 @@ If the user asks a general question (e.g., "What are people saying about AI?", "
                     ],
                     max_tokens=800,
                     temperature=0.2,
+                    on_token=on_token,
                 )
-                
-                answer_text = answer.choices[0].message.content.strip()
         except Exception as e:
             logger.error("Failed to generate answer", error=str(e))
             answer_text = "I encountered an error while generating an answer."
         
+        try:
+            self.db.add(ChatMessage(user_id=user_id, question=question, answer=answer_text, citations=citations))
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error("Failed to store chat message", user_id=user_id, error=str(e))
+        
         return {
             "answer": answer_text,
             "citations": citations,
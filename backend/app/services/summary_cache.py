@@ -0,0 +1,148 @@
+"""Cache for LLM post summaries."""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+import structlog
+from app.config import settings
+from app.models import SummaryCacheEntry
+from app.services.llm import LLMService
+
+logger = structlog.get_logger()
+
+CacheKey = Tuple[str, str, int]  # (content_hash, model, max_sentences)
+
+_RETWEET_PREFIX = re.compile(r"^RT @\w+:\s*")
+_WHITESPACE = re.compile(r"\s+")
+
+# Process-wide state, shared by every SummaryCache instance
+_lru: "OrderedDict[CacheKey, str]" = OrderedDict()
+_inflight: Dict[CacheKey, "_InFlight"] = {}
+_lock = threading.Lock()
+
+
+class _InFlight:
+    """An LLM call that other callers for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.summary: Optional[str] = None
+
+
+def content_hash(text: str) -> str:
+    """Hash post text after stripping retweet prefixes and normalizing whitespace."""
+    normalized = _RETWEET_PREFIX.sub("", text.strip())
+    normalized = _WHITESPACE.sub(" ", normalized).strip().lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    Memoizes LLMService summaries by (content hash, model, max_sentences).
+
+    Lookups go through an in-process LRU, then the summary_cache table. On a miss
+    only one caller per key runs the LLM; concurrent callers wait for its result.
+    Fallback (truncated) summaries are never cached.
+    """
+
+    def __init__(self, db: Session, llm_service: LLMService):
+        self.db = db
+        self.llm_service = llm_service
+
+    def get_summary(self, text: str, max_sentences: int = 2) -> str:
+        """
+        Get a summary of text, calling the LLM only if no cached summary exists.
+
+        Args:
+            text: Text to summarize
+            max_sentences: Maximum number of sentences in summary
+
+        Returns:
+            Summary string
+        """
+        key = (content_hash(text), self.llm_service.model, max_sentences)
+
+        summary = self._lru_get(key)
+        if summary is not None:
+            return summary
+
+        with _lock:
+            flight = _inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _InFlight()
+                _inflight[key] = flight
+
+        if not leader:
+            flight.done.wait(settings.summary_inflight_timeout_seconds)
+            return flight.summary or self.llm_service.truncate(text)
+
+        try:
+            summary = self._db_get(key)
+            if summary is None:
+                summary = self.llm_service.summarize(text, max_sentences=max_sentences)
+                if summary is not None:
+                    self._db_put(key, summary)
+            if summary is not None:
+                self._lru_put(key, summary)
+            flight.summary = summary
+        finally:
+            with _lock:
+                _inflight.pop(key, None)
+            flight.done.set()
+
+        return summary or self.llm_service.truncate(text)
+
+    def get_group_summary(self, texts: List[str], max_sentences: int = 3) -> str:
+        """Summarize several posts with a single (cached) LLM call."""
+        if len(texts) == 1:
+            return self.get_summary(texts[0], max_sentences=2)
+        return self.get_summary("\n\n".join(texts), max_sentences=max_sentences)
+
+    def _db_get(self, key: CacheKey) -> Optional[str]:
+        entry = (
+            self.db.query(SummaryCacheEntry)
+            .filter(
+                SummaryCacheEntry.content_hash == key[0],
+                SummaryCacheEntry.model == key[1],
+                SummaryCacheEntry.max_sentences == key[2],
+            )
+            .first()
+        )
+        return entry.summary if entry else None
+
+    def _db_put(self, key: CacheKey, summary: str) -> None:
+        """
+        Insert the summary; committed with the caller's transaction.
+
+        The insert runs in a savepoint, so a failure rolls back only the insert
+        and leaves the caller's transaction usable.
+        """
+        try:
+            with self.db.begin_nested():
+                self.db.execute(
+                    insert(SummaryCacheEntry)
+                    .values(content_hash=key[0], model=key[1], max_sentences=key[2], summary=summary)
+                    .on_conflict_do_nothing(index_elements=["content_hash", "model", "max_sentences"])
+                )
+        except Exception as e:
+            logger.error("Failed to store cached summary", error=str(e))
+
+    @staticmethod
+    def _lru_get(key: CacheKey) -> Optional[str]:
+        with _lock:
+            summary = _lru.get(key)
+            if summary is not None:
+                _lru.move_to_end(key)
+            return summary
+
+    @staticmethod
+    def _lru_put(key: CacheKey, summary: str) -> None:
+        with _lock:
+            _lru[key] = summary
+            _lru.move_to_end(key)
+            while len(_lru) > settings.summary_cache_size:
+                _lru.popitem(last=False)
@@ -0,0 +1,56 @@
+"""Token counting for LLM prompt budgets."""
+import threading
+from typing import Any, Optional
+import structlog
+from app.config import settings
+
+try:
+    import tiktoken
+except ImportError:  # Token counts fall back to a length estimate
+    tiktoken = None
+
+logger = structlog.get_logger()
+
+# Rough English average, used when no tokenizer is available
+_CHARS_PER_TOKEN = 4
+
+_encoding: Optional[Any] = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding() -> Optional[Any]:
+    """Load the tokenizer for settings.llm_model once; None if tiktoken or its data is unavailable."""
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            if tiktoken is not None:
+                try:
+                    try:
+                        _encoding = tiktoken.encoding_for_model(settings.llm_model)
+                    except KeyError:
+                        _encoding = tiktoken.get_encoding("o200k_base")
+                except Exception as e:
+                    logger.warning("Tokenizer unavailable, estimating tokens from length", error=str(e))
+        return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens text uses in a prompt."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text) // _CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens, marking the cut with "..."."""
+    encoding = _get_encoding()
+    if encoding is None:
+        limit = max_tokens * _CHARS_PER_TOKEN
+        return text if len(text) <= limit else text[:limit] + "..."
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens]) + "..."
@@ -0,0 +1,255 @@
+"""Sliding-window trend detection over post entities."""
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+import structlog
+from app.config import settings
+from app.models import MonitoredAccount, Post, PostEntity
+from app.services.entities import CASHTAG, HASHTAG, MENTION, normalize
+
+logger = structlog.get_logger()
+
+_EPOCH = datetime(1970, 1, 1)
+_PREFIXES = {"$": CASHTAG, "#": HASHTAG, "@": MENTION}
+
+_engine: Optional["TrendEngine"] = None
+_engine_lock = threading.Lock()
+
+
+def entity_key(kind: str, value: str) -> str:
+    """Counter key for a normalized entity, e.g. "cashtag:SOL"."""
+    return f"{kind}:{value}"
+
+
+def term_key(term: str) -> str:
+    """
+    Counter key for a rule term.
+
+    "$SOL", "#ai" and "@user" name their kind; a bare word is taken as a cashtag.
+    """
+    term = term.strip()
+    kind = _PREFIXES.get(term[:1], CASHTAG)
+    return entity_key(kind, normalize(kind, term))
+
+
+class WindowedCountMinSketch:
+    """
+    Count-min sketches over a ring of fixed-size time buckets.
+
+    Memory is buckets * depth * width int32 counters no matter how many distinct
+    keys are counted. Estimates never undercount; collisions can only inflate them.
+    """
+
+    def __init__(self, buckets: int, width: int, depth: int):
+        self.buckets = buckets
+        self.width = width
+        self.depth = depth
+        self.tables = np.zeros((buckets, depth, width), dtype=np.int32)
+        self.bucket_ids = np.full(buckets, -1, dtype=np.int64)
+        self._rows = np.arange(depth)
+
+    def _columns(self, key: str) -> np.ndarray:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=4 * self.depth).digest()
+        return np.frombuffer(digest, dtype="<u4") % self.width
+
+    def add(self, key: str, bucket: int, now_bucket: int, count: int = 1) -> None:
+        """Count key in a bucket; buckets that have left the ring are ignored."""
+        if bucket <= now_bucket - self.buckets or bucket > now_bucket:
+            return
+        slot = bucket % self.buckets
+        if self.bucket_ids[slot] != bucket:
+            if self.bucket_ids[slot] > bucket:
+                return
+            self.tables[slot] = 0
+            self.bucket_ids[slot] = bucket
+        self.tables[slot, self._rows, self._columns(key)] += count
+
+    def estimate(self, key: str, first_bucket: int, last_bucket: int) -> int:
+        """Estimated count of key over buckets first_bucket..last_bucket inclusive."""
+        live = (self.bucket_ids >= first_bucket) & (self.bucket_ids <= last_bucket)
+        if not live.any():
+            return 0
+        # Gathers buckets x depth counters; the tables themselves are never copied
+        per_bucket = self.tables[:, self._rows, self._columns(key)].min(axis=1)
+        return int(per_bucket[live].sum())
+
+
+class TrendEngine:
+    """
+    Per-tenant streaming entity counters for burst ("trend") alert rules.
+
+    Each tenant gets one WindowedCountMinSketch covering trend_baseline_hours in
+    trend_bucket_minutes buckets, allocated on first use. The alert engine feeds it
+    every post exactly once (as posts are marked checked) and asks, per rule window,
+    how the latest window compares to the baseline rate before it.
+
+    Memory is bounded: once per bucket, sketches with nothing left inside the
+    baseline are dropped (losing nothing), and at most trend_max_tenants sketches
+    are kept, evicting the least recently observed tenant beyond that.
+    """
+
+    def __init__(
+        self,
+        bucket_minutes: Optional[int] = None,
+        baseline_hours: Optional[int] = None,
+        width: Optional[int] = None,
+        depth: Optional[int] = None,
+        max_tenants: Optional[int] = None,
+    ):
+        self.bucket_seconds = (bucket_minutes or settings.trend_bucket_minutes) * 60
+        self.buckets = math.ceil((baseline_hours or settings.trend_baseline_hours) * 3600 / self.bucket_seconds)
+        self.width = width or settings.trend_sketch_width
+        self.depth = depth or settings.trend_sketch_depth
+        self.max_tenants = max_tenants or settings.trend_max_tenants
+        self._sketches: "OrderedDict[int, WindowedCountMinSketch]" = OrderedDict()
+        self._swept_bucket = -1
+        self._lock = threading.Lock()
+        self.warmed = False
+
+    def _bucket(self, at: datetime) -> int:
+        return int((at - _EPOCH).total_seconds() // self.bucket_seconds)
+
+    def observe(self, user_id: int, keys: Iterable[str], at: datetime, now: Optional[datetime] = None, count: int = 1) -> None:
+        """
+        Count entity keys seen in one of a tenant's posts.
+
+        Args:
+            user_id: Tenant owning the post
+            keys: Entity keys (see entity_key)
+            at: Post time; future times count as now
+            now: Current time (default utcnow)
+            count: Increment; -1 takes back an observation whose batch was rolled back
+        """
+        now_bucket = self._bucket(now or datetime.utcnow())
+        bucket = min(self._bucket(at), now_bucket)
+        with self._lock:
+            if now_bucket != self._swept_bucket:
+                self._evict_expired(now_bucket)
+            sketch = self._sketches.get(user_id)
+            if sketch is None:
+                if count < 0:
+                    return
+                sketch = self._sketches[user_id] = WindowedCountMinSketch(self.buckets, self.width, self.depth)
+                while len(self._sketches) > self.max_tenants:
+                    evicted, _ = self._sketches.popitem(last=False)
+                    logger.warning("Evicted trend counters for tenant", user_id=evicted, max_tenants=self.max_tenants)
+            self._sketches.move_to_end(user_id)
+            for key in keys:
+                sketch.add(key, bucket, now_bucket, count)
+
+    def _evict_expired(self, now_bucket: int) -> None:
+        """Drop sketches whose every bucket has left the baseline; caller holds the lock."""
+        self._swept_bucket = now_bucket
+        expired = [
+            user_id for user_id, sketch in self._sketches.items()
+            if sketch.bucket_ids.max() <= now_bucket - self.buckets
+        ]
+        for user_id in expired:
+            del self._sketches[user_id]
+        if expired:
+            logger.info("Dropped idle trend counters", tenants=len(expired))
+
+    def trend(self, user_id: int, key: str, window_minutes: int, now: Optional[datetime] = None) -> Tuple[int, float]:
+        """
+        Compare the latest window with the baseline rate.
+
+        Args:
+            user_id: Tenant
+            key: Entity key
+            window_minutes: Length of the latest window, rounded up to whole buckets
+            now: Current time (default utcnow)
+
+        Returns:
+            (count in the window, ratio to the count expected from the preceding
+            baseline, with the expectation floored at 1)
+        """
+        with self._lock:
+            sketch = self._sketches.get(user_id)
+            if sketch is None:
+                return 0, 0.0
+            now_bucket = self._bucket(now or datetime.utcnow())
+            window_buckets = min(max(1, math.ceil(window_minutes * 60 / self.bucket_seconds)), self.buckets - 1)
+            current = sketch.estimate(key, now_bucket - window_buckets + 1, now_bucket)
+            baseline = sketch.estimate(key, now_bucket - self.buckets + 1, now_bucket - window_buckets)
+
+        baseline_windows = (self.buckets - window_buckets) / window_buckets
+        expected = max(baseline / baseline_windows, 1.0)
+        return current, current / expected
+
+    def warm(self, db: Session) -> int:
+        """
+        Rebuild counters from posts already checked for alerts within the baseline.
+
+        Posts not yet checked are left out; the alert engine observes them when it
+        checks them, so nothing is counted twice.
+
+        Returns:
+            Number of entity observations loaded
+        """
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=self.buckets * self.bucket_seconds)
+        rows = (
+            db.query(MonitoredAccount.user_id, PostEntity.kind, PostEntity.value, Post.created_at)
+            .join(Post, PostEntity.post_id == Post.id)
+            .join(MonitoredAccount, Post.author_id == MonitoredAccount.id)
+            .filter(Post.alerts_checked_at.isnot(None), Post.created_at >= cutoff)
+            .yield_per(5000)
+        )
+        loaded = 0
+        for user_id, kind, value, created_at in rows:
+            self.observe(user_id, [entity_key(kind, value)], created_at, now=now)
+            loaded += 1
+        self.warmed = True
+        logger.info("Warmed trend counters", observations=loaded, tenants=len(self._sketches))
+        return loaded
+
+    def trending_keys(
+        self,
+        user_id: int,
+        keys: Iterable[str],
+        window_minutes: int,
+        multiplier: float,
+        min_count: int,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, float]:
+        """
+        Keys whose latest window reaches min_count and multiplier times the baseline.
+
+        Returns:
+            dict of key -> ratio
+        """
+        trending = {}
+        for key in keys:
+            count, ratio = self.trend(user_id, key, window_minutes, now=now)
+            if count >= min_count and ratio >= multiplier:
+                trending[key] = ratio
+        return trending
+
+
+def get_trend_engine() -> TrendEngine:
+    """Get the process-wide trend engine."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = TrendEngine()
+        return _engine
+
+
+def post_entity_keys(db: Session, post_ids: List[int]) -> Dict[int, List[str]]:
+    """Load entity keys for a batch of posts in one query."""
+    keys: Dict[int, List[str]] = {post_id: [] for post_id in post_ids}
+    if not post_ids:
+        return keys
+    rows = (
+        db.query(PostEntity.post_id, PostEntity.kind, PostEntity.value)
+        .filter(PostEntity.post_id.in_(post_ids))
+        .all()
+    )
+    for post_id, kind, value in rows:
+        keys[post_id].append(entity_key(kind, value))
+    return keys
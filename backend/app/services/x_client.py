@@ -151,7 +151,7 @@ class RealXClient(XClient):
         try:
             params = {
                 "max_results": 100,
-                "tweet.fields": "created_at,text,author_id",
+                "tweet.fields": "created_at,text,author_id,entities",
                 "expansions": "author_id",
             }
             
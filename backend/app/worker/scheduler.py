@@ -2,7 +2,7 @@
 from datetime import datetime, time, timedelta
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy.orm import joinedload
 import structlog
 from app.config import settings
 from app.database import SessionLocal, engine
@@ -11,8 +11,10 @@ from app.services.x_client import RealXClient, MockXClient
 from app.services.alerts import AlertEngine
 from app.services.embeddings import EmbeddingsService
 from app.services.llm import LLMService
-from app.services.digest import DigestService
+from app.services.digest_runner import DigestRunner
+from app.services.dispatcher import NotificationDispatcher
 from app.notifiers.log import LogNotifier
+from app.notifiers.webhook import WebhookNotifier
 from app.models import Post
 
 logger = structlog.get_logger()
@@ -39,9 +41,11 @@ def run_ingestion_job():
             errors_count=len(result["errors"]),
         )
         
-        # Check new posts for alerts
-        if result["posts_stored"] > 0:
-            check_alerts_for_new_posts(db)
+        # Check new posts for alerts (also picks up posts stored by manual ingestion)
+        check_alerts_for_new_posts(db)
+        
+        if settings.digest_mode == "incremental":
+            update_rolling_digests()
     except Exception as e:
         logger.error("Ingestion job failed", error=str(e))
     finally:
@@ -49,46 +53,144 @@ def run_ingestion_job():
 
 
 def check_alerts_for_new_posts(db):
-    """Check alerts for recently stored posts."""
+    """Check alerts for every post that has not been evaluated yet."""
     try:
-        # Get posts from last 5 minutes (newly ingested)
-        cutoff = datetime.utcnow() - timedelta(minutes=5)
-        new_posts = db.query(Post).filter(Post.stored_at >= cutoff).all()
-        
-        if not new_posts:
-            return
-        
         embeddings_service = EmbeddingsService()
         llm_service = LLMService()
-        notifier = LogNotifier()
-        alert_engine = AlertEngine(db, embeddings_service, llm_service, notifier)
+        alert_engine = AlertEngine(db, embeddings_service, llm_service)
         
-        for post in new_posts:
-            try:
-                alert_engine.check_post(post)
-            except Exception as e:
-                logger.error("Failed to check alerts for post", post_id=post.id, error=str(e))
+        totals = {"posts_checked": 0, "alerts_triggered": 0, "embeddings_generated": 0, "errors": 0, "posts_failed": 0}
+        for batch in iter_unchecked_posts(db, settings.alert_batch_size):
+            check_batch(alert_engine, db, batch, totals)
+        
+        if totals["posts_checked"] or totals["posts_failed"]:
+            logger.info("Alert check completed", **totals)
     except Exception as e:
         logger.error("Failed to check alerts", error=str(e))
 
 
-def run_digest_job():
-    """Job to generate daily digest."""
-    logger.info("Starting digest job")
+def check_batch(alert_engine: AlertEngine, db, batch, totals: dict) -> None:
+    """
+    Check a batch of posts, bisecting it when check_posts raises.
+    
+    The halves are retried separately so one bad post cannot hold back the rest
+    of its batch. A post that fails on its own has its failure counted; after
+    alert_check_max_failures it is marked checked with the error, so later runs
+    stop retrying it and later posts are never starved.
+    """
+    try:
+        result = alert_engine.check_posts(batch)
+    except Exception as e:
+        db.rollback()
+        if len(batch) > 1:
+            middle = len(batch) // 2
+            check_batch(alert_engine, db, batch[:middle], totals)
+            check_batch(alert_engine, db, batch[middle:], totals)
+        else:
+            record_check_failure(db, batch[0].id, e)
+            totals["posts_failed"] += 1
+        return
+    
+    totals["posts_checked"] += result["posts_checked"]
+    totals["alerts_triggered"] += result["alerts_triggered"]
+    totals["embeddings_generated"] += result["embeddings_generated"]
+    totals["errors"] += len(result["errors"])
+
+
+def record_check_failure(db, post_id: int, error: Exception) -> None:
+    """Count a failed alert check of one post, giving up on it after alert_check_max_failures."""
+    post = db.query(Post).filter(Post.id == post_id).first()
+    if post is None:
+        return
+    post.alert_check_failures += 1
+    if post.alert_check_failures >= settings.alert_check_max_failures:
+        post.alerts_checked_at = datetime.utcnow()
+        post.alert_check_error = str(error)
+        logger.error("Giving up on alert check for post", post_id=post_id, failures=post.alert_check_failures, error=str(error))
+    else:
+        logger.warning("Alert check failed for post", post_id=post_id, failures=post.alert_check_failures, error=str(error))
+    db.commit()
+
+
+def update_rolling_digests():
+    """Fold new posts into each user's rolling digest state."""
+    try:
+        stats = DigestRunner(SessionLocal, LogNotifier()).update_rolling_states()
+        logger.info(
+            "Rolling digests updated",
+            users=stats["users"],
+            updated=stats["updated"],
+            failed=stats["failed"],
+        )
+    except Exception as e:
+        logger.error("Failed to update rolling digests", error=str(e))
+
+
+def iter_unchecked_posts(db, batch_size: int):
+    """
+    Yield unchecked posts in keyset-paginated batches ordered by id.
+    
+    Each page is a fresh LIMIT query, so check_posts can commit between pages.
+    """
+    last_id = 0
+    while True:
+        batch = (
+            db.query(Post)
+            .options(joinedload(Post.author))
+            .filter(Post.alerts_checked_at.is_(None), Post.id > last_id)
+            .order_by(Post.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].id
+
+
+def run_dispatch_job(dispatcher: NotificationDispatcher):
+    """Job to deliver queued alert notifications."""
+    try:
+        dispatcher.dispatch_pending()
+    except Exception as e:
+        logger.error("Dispatch job failed", error=str(e))
+
+
+def run_summary_job():
+    """Job to attach LLM summaries to alerts delivered in two-phase mode."""
     db = SessionLocal()
     try:
-        llm_service = LLMService()
-        notifier = LogNotifier()
-        service = DigestService(db, llm_service, notifier)
-        digest = service.generate_digest()
-        
-        logger.info("Digest job completed", digest_id=digest.id, digest_date=digest.digest_date)
+        alert_engine = AlertEngine(db, EmbeddingsService(), LLMService())
+        summarized = alert_engine.summarize_pending()
+        if summarized:
+            logger.info("Summary job completed", alerts_summarized=summarized)
     except Exception as e:
-        logger.error("Digest job failed", error=str(e))
+        logger.error("Summary job failed", error=str(e))
     finally:
         db.close()
 
 
+def run_digest_job():
+    """Job to generate digests for users whose local digest time has passed."""
+    try:
+        runner = DigestRunner(SessionLocal, LogNotifier())
+        due = runner.due_digests()
+        if not due:
+            return
+        
+        logger.info("Starting digest job", users=len(due))
+        stats = runner.run(due.keys(), digest_dates=due)
+        
+        logger.info(
+            "Digest job completed",
+            users=stats["users"],
+            generated=stats["generated"],
+            failed=stats["failed"],
+        )
+    except Exception as e:
+        logger.error("Digest job failed", error=str(e))
+
+
 def start_scheduler():
     """Start the scheduler with configured jobs."""
     scheduler = BlockingScheduler()
@@ -104,19 +206,53 @@ def start_scheduler():
     )
     logger.info("Scheduled ingestion job", interval_minutes=polling_interval)
     
-    # Digest job: run at configured time
-    digest_time_parts = settings.digest_time.split(":")
-    hour = int(digest_time_parts[0])
-    minute = int(digest_time_parts[1]) if len(digest_time_parts) > 1 else 0
+    # Dispatch job: drain the alert outbox independently of rule evaluation
+    dispatcher = NotificationDispatcher(
+        SessionLocal,
+        notifiers={"webhook": WebhookNotifier()},
+        default_notifier=LogNotifier(),
+    )
+    scheduler.add_job(
+        run_dispatch_job,
+        args=[dispatcher],
+        trigger=IntervalTrigger(seconds=settings.dispatch_interval_seconds),
+        id="dispatch_job",
+        name="Alert Dispatch Job",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+    logger.info("Scheduled dispatch job", interval_seconds=settings.dispatch_interval_seconds)
+    
+    # Summary job: LLM summaries are kept off the alert critical path
+    if settings.alert_summary_mode == "two_phase":
+        scheduler.add_job(
+            run_summary_job,
+            trigger=IntervalTrigger(seconds=settings.summary_interval_seconds),
+            id="summary_job",
+            name="Alert Summary Job",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+        logger.info("Scheduled summary job", interval_seconds=settings.summary_interval_seconds)
     
+    # Digest job: each user's digest runs at their own local time (see DigestRunner.due_digests)
     scheduler.add_job(
         run_digest_job,
-        trigger=CronTrigger(hour=hour, minute=minute, timezone=settings.timezone),
+        trigger=IntervalTrigger(minutes=settings.digest_schedule_interval_minutes),
         id="digest_job",
         name="Daily Digest Job",
         replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+    logger.info(
+        "Scheduled digest job",
+        interval_minutes=settings.digest_schedule_interval_minutes,
+        default_time=settings.digest_time,
+        default_timezone=settings.timezone,
     )
-    logger.info("Scheduled digest job", time=settings.digest_time, timezone=settings.timezone)
     
     logger.info("Scheduler started")
     scheduler.start()
@@ -0,0 +1,36 @@
+"""Measure HNSW search recall against exact search for every user with embedded posts."""
+import sys
+from sqlalchemy import func
+from app.database import SessionLocal
+from app.models import Post
+from app.services.embeddings import EmbeddingsService
+from app.services.llm import LLMService
+from app.services.rag import RAGService
+
+
+def check_vector_recall(samples: int = 20, limit: int = 10):
+    db = SessionLocal()
+    try:
+        user_ids = [
+            user_id for (user_id,) in (
+                db.query(Post.user_id)
+                .filter(Post.embedding.isnot(None))
+                .group_by(Post.user_id)
+                .having(func.count(Post.id) > limit)
+            )
+        ]
+        service = RAGService(db, EmbeddingsService(), LLMService())
+        for user_id in user_ids:
+            stats = service.measure_recall(user_id, samples=samples, limit=limit)
+            if stats["recall"] is None:
+                continue
+            print(
+                f"user {user_id}: recall@{limit} {stats['recall']:.3f} "
+                f"(min {stats['min_recall']:.3f}, {stats['queries']} queries, ef_search {stats['ef_search']})"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    check_vector_recall(*(int(arg) for arg in sys.argv[1:3]))
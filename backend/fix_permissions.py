@@ -15,6 +15,7 @@ try:
         
         statements = [
             "CREATE EXTENSION IF NOT EXISTS vector",
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",  # gin_trgm_ops index on posts.text
             "GRANT ALL ON SCHEMA public TO pinglet",
             "GRANT ALL PRIVILEGES ON DATABASE pinglet TO pinglet",
             "ALTER USER pinglet WITH CREATEDB" # Optional but helpful for dev
@@ -0,0 +1,155 @@
+"""WebhookNotifier against a local stand-in HTTP server."""
+import hashlib
+import hmac
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+
+from app.models import AlertRule, Post
+from app.notifiers.webhook import WebhookNotifier
+
+
+class StandInServer:
+    """Records every request and answers with queued status codes (then 200)."""
+
+    def __init__(self):
+        self.requests: List[Dict[str, Any]] = []
+        self.statuses: List[int] = []
+        self.lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                with server.lock:
+                    server.requests.append({"headers": dict(self.headers), "body": body})
+                    status = server.statuses.pop(0) if server.statuses else 200
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/hook"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    stand_in = StandInServer()
+    yield stand_in
+    stand_in.close()
+
+
+@pytest.fixture
+def client():
+    with httpx.Client(timeout=5) as http_client:
+        yield http_client
+
+
+def make_notifier(server, client, **kwargs) -> WebhookNotifier:
+    options = {"secret": "", "batch_window_ms": 0, "retry_backoff_ms": 10}
+    options.update(kwargs)
+    return WebhookNotifier(default_url=server.url, client=client, **options)
+
+
+def make_rule() -> AlertRule:
+    return AlertRule(id=7, name="BTC moves", user_id=1)
+
+
+def make_post(post_id: int) -> Post:
+    return Post(
+        id=post_id,
+        x_post_id=str(1000 + post_id),
+        text=f"post {post_id}",
+        url=f"https://x.com/i/status/{1000 + post_id}",
+        created_at=datetime(2026, 10, 19, 12, 0),
+    )
+
+
+def test_batches_concurrent_alerts_into_one_request(server, client):
+    notifier = make_notifier(server, client, batch_window_ms=300, max_batch_size=50)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(
+            lambda i: notifier.send_alert(make_rule(), make_post(i), "summary", {"delivery_id": i}),
+            range(5),
+        ))
+
+    assert results == [True] * 5
+    assert len(server.requests) == 1
+    payload = json.loads(server.requests[0]["body"])
+    assert payload["type"] == "alerts"
+    assert sorted(alert["delivery_id"] for alert in payload["alerts"]) == list(range(5))
+
+
+def test_full_batch_is_sent_without_waiting_for_the_window(server, client):
+    notifier = make_notifier(server, client, batch_window_ms=5000, max_batch_size=2)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(
+            lambda i: notifier.send_alert(make_rule(), make_post(i), "summary", {"delivery_id": i}),
+            range(2),
+        ))
+
+    assert results == [True, True]
+    assert len(server.requests) == 1
+
+
+def test_signs_payload_with_hmac(server, client):
+    notifier = make_notifier(server, client, secret="s3cret")
+
+    assert notifier.send_alert(make_rule(), make_post(1), "summary", {"delivery_id": 1})
+
+    request = server.requests[0]
+    headers = {key.lower(): value for key, value in request["headers"].items()}
+    timestamp = headers["x-pinglet-timestamp"]
+    expected = hmac.new(b"s3cret", timestamp.encode() + b"." + request["body"], hashlib.sha256).hexdigest()
+    assert headers["x-pinglet-signature"] == f"sha256={expected}"
+
+
+def test_retries_5xx_with_stable_idempotency_key(server, client):
+    server.statuses = [503, 502]
+    notifier = make_notifier(server, client, max_retries=2)
+
+    assert notifier.send_alert(make_rule(), make_post(1), "summary", {"delivery_id": 42})
+
+    assert len(server.requests) == 3
+    keys = {
+        {key.lower(): value for key, value in request["headers"].items()}["idempotency-key"]
+        for request in server.requests
+    }
+    assert keys == {"42"}
+    assert len({request["body"] for request in server.requests}) == 1
+
+
+def test_gives_up_after_max_retries(server, client):
+    server.statuses = [500, 500, 500, 500]
+    notifier = make_notifier(server, client, max_retries=2)
+
+    assert not notifier.send_alert(make_rule(), make_post(1), "summary", {"delivery_id": 1})
+    assert len(server.requests) == 3
+
+
+def test_does_not_retry_4xx(server, client):
+    server.statuses = [400]
+    notifier = make_notifier(server, client, max_retries=2)
+
+    assert not notifier.send_alert(make_rule(), make_post(1), "summary", {"delivery_id": 1})
+    assert len(server.requests) == 1
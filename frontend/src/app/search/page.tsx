@@ -30,7 +30,7 @@ export default function SearchPage() {
       <div className="space-y-6">
         <div>
           <h1 className="text-3xl font-bold text-gray-900">Search</h1>
-          <p className="text-gray-600 mt-2">Search posts using vector similarity</p>
+          <p className="text-gray-600 mt-2">Search posts by keyword and meaning</p>
         </div>
 
         <SearchBar onSearch={handleSearch} isLoading={isLoading} />
@@ -31,7 +31,11 @@ export function SearchResults({ results, query }: SearchResultsProps) {
             <div className="flex items-start justify-between mb-3">
               <div className="flex-1">
                 <div className="flex items-center gap-2 mb-2">
-                  <Badge variant="default">Similarity: {(result.similarity * 100).toFixed(1)}%</Badge>
+                  {result.similarity !== null ? (
+                    <Badge variant="default">Similarity: {(result.similarity * 100).toFixed(1)}%</Badge>
+                  ) : (
+                    <Badge variant="default">Keyword match</Badge>
+                  )}
                   <span className="text-xs text-gray-500">{formatDate(result.created_at)}</span>
                 </div>
                 <p className="text-gray-900 mb-2">{result.text}</p>
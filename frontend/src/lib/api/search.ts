@@ -7,7 +7,9 @@ export interface SearchResult {
   created_at: string;
   text: string;
   url: string | null;
-  similarity: number;
+  similarity: number | null; // null for full-text-only matches
+  score?: number; // Rank-fused score in hybrid and lexical modes
+  matches_all_terms?: boolean;
 }
 
 export interface SearchResponse {